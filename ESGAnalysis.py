@@ -0,0 +1,738 @@
+import re
+import json
+from functools import partial
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ESGClient import DeepSeekAPIError
+from ESGText import CHARS_PER_TOKEN, SHARED_TOKEN_ESTIMATOR, TokenEstimator
+
+# --- DeepSeek Settings ---
+DEEPSEEK_MODEL = "deepseek-chat"
+DEEPSEEK_TEMPERATURE = 0.5
+DEEPSEEK_MAX_TOKENS = 8000  # Upper bound on the completion; the actual max_tokens is sized per request
+DEEPSEEK_CONTEXT_TOKENS = 65536  # Context window shared by prompt and completion
+OUTPUT_TOKENS_RESERVED = 4096  # Completion budget always kept free when fitting the document
+CONTEXT_SAFETY_MARGIN = 0.05  # Share of the context window left unused to absorb estimation error
+
+# --- Prompt Settings ---
+PROMPT_VERSION = 1  # Bump whenever the analysis prompt changes to invalidate cached responses
+PROMPT_MAX_CHARS = 500000  # Document characters sent to the model in a single request
+CHUNK_TOKENS = 24000  # Document tokens per chunk in chunked mode
+CHUNK_CONCURRENCY = 4  # Concurrent DeepSeek requests in chunked mode
+PILLAR_CONCURRENCY = 4  # Concurrent DeepSeek requests in per-pillar mode
+
+# Never calibrated: sizes prompts while a cassette records or replays (see token_estimator)
+PINNED_TOKEN_ESTIMATOR = TokenEstimator()
+
+ESG_PROMPT_TEMPLATE = """
+    You are an expert ESG analyst. Carefully read the following ESG disclosure and generate a detailed analysis. Be specific and data-driven.
+
+    Provide the analysis in these sections:
+
+    1. 🌍 **Environmental (E)**:
+       - Give **10 detailed insights** about energy use, emissions, renewable energy adoption, waste reduction, water conservation, climate initiatives, biodiversity actions, etc.
+       - Use **quantitative data**, clear targets, and named programs or initiatives.
+       - Mention **year-over-year improvements** or regressions if applicable.
+       - Avoid vague statements; elaborate where necessary.
+
+    2. 🏢 **Social (S)**:
+       - Give **10 detailed insights** covering labor practices, diversity & inclusion, community engagement, training programs, health & safety, etc.
+       - Include **figures**, **employee stats**, and **notable case studies** if present.
+       - Highlight notable changes over time and any certifications or recognitions.
+
+    3. 🏛 **Governance (G)**:
+       - Provide **10 robust insights** on board structure, executive compensation, risk management, ethics programs, whistleblower mechanisms, and audit independence.
+       - Use **board diversity numbers**, policy names, or governance frameworks where mentioned.
+
+    4. 🎤 **Key Management Remarks**:
+       - Extract **5–10 strong quotes** from executive leadership, especially forward-looking or strategic statements.
+       - Attribute each quote to a named executive or title if mentioned.
+
+    5. 🎯 **ESG Sentiment Score**:
+       - Rate from 1–10 (10 = exceptional ESG commitment and execution).
+       - Justify score briefly in 1–2 lines by considering specificity, tone, and depth of ESG strategy.
+
+    Return only the output in this structured format:
+        ```
+        Environmental:
+        1. Insight 1...
+        2. Insight 2...
+        ...
+        10. Insight 10...
+
+        Social:
+        1. Insight 1...
+        ...
+        10. Insight 10...
+
+        Governance:
+        1. Insight 1...
+        ...
+        10. Insight 1...
+
+        Key Remarks:
+        1. "Quote 1..." - [Title]
+        2. "Quote 2..." - [Title]
+        ...
+
+        ESG Sentiment Score: X/10
+        ```
+
+    DOCUMENT TEXT:
+    {document_text}
+    """
+
+
+# Per-pillar mode: the document comes first so every pillar request shares the same prompt prefix
+PILLAR_PROMPT_TEMPLATE = """
+    You are an expert ESG analyst. Carefully read the following ESG disclosure. Be specific and data-driven.
+
+    DOCUMENT TEXT:
+    {document_text}
+
+    TASK:
+    {task}
+
+    Return only the output in this structured format:
+        ```
+        {output_format}
+        ```
+    """
+
+PILLAR_PROMPTS = {
+    "environment": ("""🌍 **Environmental (E)**:
+       - Give **10 detailed insights** about energy use, emissions, renewable energy adoption, waste reduction, water conservation, climate initiatives, biodiversity actions, etc.
+       - Use **quantitative data**, clear targets, and named programs or initiatives.
+       - Mention **year-over-year improvements** or regressions if applicable.
+       - Avoid vague statements; elaborate where necessary.""",
+                    """Environmental:
+        1. Insight 1...
+        2. Insight 2...
+        ...
+        10. Insight 10..."""),
+    "social": ("""🏢 **Social (S)**:
+       - Give **10 detailed insights** covering labor practices, diversity & inclusion, community engagement, training programs, health & safety, etc.
+       - Include **figures**, **employee stats**, and **notable case studies** if present.
+       - Highlight notable changes over time and any certifications or recognitions.""",
+               """Social:
+        1. Insight 1...
+        ...
+        10. Insight 10..."""),
+    "governance": ("""🏛 **Governance (G)**:
+       - Provide **10 robust insights** on board structure, executive compensation, risk management, ethics programs, whistleblower mechanisms, and audit independence.
+       - Use **board diversity numbers**, policy names, or governance frameworks where mentioned.""",
+                   """Governance:
+        1. Insight 1...
+        ...
+        10. Insight 10..."""),
+    "management_remarks": ("""🎤 **Key Management Remarks**:
+       - Extract **5–10 strong quotes** from executive leadership, especially forward-looking or strategic statements.
+       - Attribute each quote to a named executive or title if mentioned.
+
+    🎯 **ESG Sentiment Score**:
+       - Rate from 1–10 (10 = exceptional ESG commitment and execution).
+       - Justify score briefly in 1–2 lines by considering specificity, tone, and depth of ESG strategy.""",
+                           """Key Remarks:
+        1. "Quote 1..." - [Title]
+        2. "Quote 2..." - [Title]
+        ...
+
+        ESG Sentiment Score: X/10"""),
+}
+
+
+# JSON output mode: the same instructions, answered as a JSON object with a fixed schema.
+# The document comes first so repair requests for missing sections share the prompt prefix.
+JSON_PROMPT_TEMPLATE = """
+    You are an expert ESG analyst. Carefully read the following ESG disclosure and generate a detailed analysis. Be specific and data-driven.
+
+    DOCUMENT TEXT:
+    {document_text}
+
+    Provide the analysis in these sections:
+
+    {tasks}
+
+    Return only a JSON object with exactly these keys:
+        {{
+        {json_keys}
+        }}
+    """
+
+JSON_SCHEMA_KEYS = {
+    "environment": '"environment": ["Insight 1...", "Insight 2...", ..., "Insight 10..."]',
+    "social": '"social": ["Insight 1...", ..., "Insight 10..."]',
+    "governance": '"governance": ["Insight 1...", ..., "Insight 10..."]',
+    "management_remarks": '"management_remarks": ["\\"Quote 1...\\" - [Title]", ...],\n'
+                          '        "sentiment_score": X,\n'
+                          '        "justification": "1-2 lines"',
+}
+JSON_FENCE_PATTERN = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+
+def build_esg_prompt(document_text):
+    """Fills the analysis prompt template with the document text"""
+    return ESG_PROMPT_TEMPLATE.format(document_text=document_text)
+
+
+def build_pillar_prompt(pillar, document_text):
+    """Fills the per-pillar prompt template for one esg_data section (see PILLAR_PROMPTS)"""
+    task, output_format = PILLAR_PROMPTS[pillar]
+    return PILLAR_PROMPT_TEMPLATE.format(document_text=document_text, task=task, output_format=output_format)
+
+
+def build_json_prompt(document_text, sections=tuple(PILLAR_PROMPTS)):
+    """
+    Fills the JSON-mode prompt template, asking for the given esg_data sections
+    (all of them by default; a subset for repair requests)
+    """
+    tasks = "\n\n    ".join(PILLAR_PROMPTS[section][0] for section in sections)
+    json_keys = ",\n        ".join(JSON_SCHEMA_KEYS[section] for section in sections)
+    return JSON_PROMPT_TEMPLATE.format(document_text=document_text, tasks=tasks, json_keys=json_keys)
+
+
+def build_payload(prompt, max_tokens=DEEPSEEK_MAX_TOKENS, json_output=False):
+    """Chat-completions request body for a single-message prompt"""
+    payload = {
+        "model": DEEPSEEK_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": DEEPSEEK_TEMPERATURE,
+        "max_tokens": max_tokens
+    }
+    if json_output:
+        payload["response_format"] = {"type": "json_object"}
+    return payload
+
+
+def token_estimator(client):
+    """
+    Estimator used to fit prompts for client: the shared, calibrated one, or a fixed ratio
+    while the client records or replays a cassette. Cassettes match on the full payload,
+    so truncation and max_tokens must not depend on which responses came back earlier.
+    """
+    return PINNED_TOKEN_ESTIMATOR if getattr(client, "cassette", None) is not None else SHARED_TOKEN_ESTIMATOR
+
+
+def fit_document(text, template_tokens, estimator=SHARED_TOKEN_ESTIMATOR,
+                 context_tokens=DEEPSEEK_CONTEXT_TOKENS, reserved_output=OUTPUT_TOKENS_RESERVED):
+    """
+    Truncates the document so a prompt with template_tokens of instructions around it
+    leaves reserved_output tokens of the context window free
+    """
+    budget = int(context_tokens * (1 - CONTEXT_SAFETY_MARGIN))
+    max_chars = min(PROMPT_MAX_CHARS, estimator.max_chars(budget - reserved_output - template_tokens))
+    document_text = text[:max_chars]
+    if len(document_text) < len(text):
+        print(f"✂️ Document truncated to {len(document_text):,} of {len(text):,} chars to fit the context window")
+    return document_text
+
+
+def fit_prompt(text, build_prompt=build_esg_prompt, estimator=SHARED_TOKEN_ESTIMATOR,
+               context_tokens=DEEPSEEK_CONTEXT_TOKENS, reserved_output=OUTPUT_TOKENS_RESERVED):
+    """
+    Builds the analysis prompt so it fits the context window: the document is truncated
+    until the estimated prompt leaves reserved_output tokens free, and max_tokens is sized
+    to the room left over (capped at DEEPSEEK_MAX_TOKENS).
+    :param build_prompt: Prompt builder taking the document text
+    :param estimator: ESGText.TokenEstimator calibrated against API usage
+    :return: (prompt, max_tokens, estimated prompt tokens)
+    """
+    template_tokens = estimator.estimate(build_prompt(""))
+    document_text = fit_document(text, template_tokens, estimator, context_tokens, reserved_output)
+
+    prompt = build_prompt(document_text)
+    prompt_tokens = estimator.estimate(prompt)
+    budget = int(context_tokens * (1 - CONTEXT_SAFETY_MARGIN))
+    max_tokens = max(reserved_output, min(DEEPSEEK_MAX_TOKENS, budget - prompt_tokens))
+    return prompt, max_tokens, prompt_tokens
+
+
+def log_token_usage(prompt, estimated_tokens, usage, estimator=SHARED_TOKEN_ESTIMATOR):
+    """Logs estimated vs actual prompt tokens and calibrates the estimator with the actual count"""
+    actual_tokens = (usage or {}).get("prompt_tokens")
+    if not actual_tokens:
+        return
+    estimator.calibrate(prompt, actual_tokens)
+    error = (estimated_tokens - actual_tokens) / actual_tokens
+    print(f"🔢 Prompt tokens: estimated {estimated_tokens:,}, actual {actual_tokens:,} ({error:+.1%}), "
+          f"completion {usage.get('completion_tokens', 0):,}; now {estimator.chars_per_token:.2f} chars/token")
+
+
+def analyze_esg_with_deepseek(text, client, response_cache=None, refresh=False,
+                              build_prompt=build_esg_prompt, prompt_version=PROMPT_VERSION, json_output=False,
+                              validate=None):
+    """
+    Improved DeepSeek analysis with better prompting and error handling
+    :param text: Document text (truncated to fit the context window, see fit_prompt)
+    :param client: ESGClient.DeepSeekClient
+    :param response_cache: Optional ESGCache.ResponseCache; responses are cached unless refresh=True
+    :param build_prompt: Prompt builder taking the document text (default: the full analysis prompt)
+    :param prompt_version: Cache version of the prompt built by build_prompt
+    :param json_output: Request a JSON object response (DeepSeek JSON output mode)
+    :param validate: Optional check of the response text; only responses passing it are cached
+                     (or served from the cache)
+    :return: Raw model response, or a "DeepSeek API Error: ..." string
+    """
+    if not text.strip():
+        print("❌ Error: Cannot send empty text to DeepSeek API!")
+        return "DeepSeek API Error: No text provided."
+
+    if response_cache is not None:
+        cache_key = response_cache.key(text[:PROMPT_MAX_CHARS], prompt_version, DEEPSEEK_MODEL,
+                                       DEEPSEEK_TEMPERATURE, DEEPSEEK_MAX_TOKENS)
+        cached_result = response_cache.get_response(cache_key, refresh=refresh)
+        if cached_result is not None and (validate is None or validate(cached_result)):
+            return cached_result
+
+    prompt, max_tokens, prompt_tokens = fit_prompt(text, build_prompt, token_estimator(client))
+
+    try:
+        response_data = client.chat(build_payload(prompt, max_tokens, json_output))
+        log_token_usage(prompt, prompt_tokens, response_data.get("usage"))
+        if "choices" in response_data:
+            result = response_data["choices"][0]["message"]["content"]
+            if response_cache is not None and (validate is None or validate(result)):
+                response_cache.put_response(cache_key, result, response_data.get("usage"))
+            return result
+        else:
+            print("❌ Unexpected API response format")
+            return "DeepSeek API Error: No insights generated."
+    except DeepSeekAPIError as e:
+        print(f"❌ {e}")
+        return f"DeepSeek API Error: {e.status_code or e}"
+    except Exception as e:
+        print(f"❌ DeepSeek API Request Failed: {e}")
+        return f"DeepSeek API Error: {str(e)}"
+
+
+def stream_esg_with_deepseek(text, client, response_cache=None, refresh=False):
+    """
+    Streaming variant of analyze_esg_with_deepseek: yields response text deltas as the
+    model generates them. A cached response is yielded in one piece; a completed
+    stream is stored in the cache.
+    :raises DeepSeekAPIError: if the request fails or the stream ends before completing
+                              (nothing is cached then)
+    """
+    if not text.strip():
+        raise DeepSeekAPIError("Cannot send empty text to DeepSeek API!")
+
+    if response_cache is not None:
+        cache_key = response_cache.key(text[:PROMPT_MAX_CHARS], PROMPT_VERSION, DEEPSEEK_MODEL,
+                                       DEEPSEEK_TEMPERATURE, DEEPSEEK_MAX_TOKENS)
+        cached_result = response_cache.get_response(cache_key, refresh=refresh)
+        if cached_result is not None:
+            yield cached_result
+            return
+
+    prompt, max_tokens, prompt_tokens = fit_prompt(text, estimator=token_estimator(client))
+    parts = []
+    usage = None
+    for event in client.stream_chat(build_payload(prompt, max_tokens)):
+        usage = event.get("usage") or usage
+        for choice in event.get("choices") or []:
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                parts.append(delta)
+                yield delta
+    log_token_usage(prompt, prompt_tokens, usage)
+
+    if response_cache is not None and parts:
+        response_cache.put_response(cache_key, "".join(parts), usage)
+
+
+def parse_esg_data(api_response):
+    """
+    Parses the structured response format in a single pass (see ESGStreamParser)
+    :return: esg_data dict with the four insight sections and the sentiment score
+    """
+    parser = ESGStreamParser()
+    parser.feed(api_response)
+    parser.close()
+    return parser.esg_data
+
+
+class ESGStreamParser:
+    """
+    Single-pass, line-oriented parser for the structured response format. Feed it
+    response text as it streams in; each call returns the (section, item) pairs whose
+    lines were completed by that chunk, and esg_data accumulates the parse_esg_data
+    structure.
+
+    Each section opens at the first occurrence of its header and runs until a line
+    starting with the next section's header (or the end of the response), keeping the
+    first 10 non-empty lines with their numbering stripped.
+    """
+
+    SECTION_HEADERS = (
+        ("Environmental:", "environment", "Social:"),
+        ("Social:", "social", "Governance:"),
+        ("Governance:", "governance", "Key Remarks:"),
+        ("Key Remarks:", "management_remarks", "ESG Sentiment Score:"),
+    )
+    MAX_ITEMS = 10
+    SCORE_MARKER = "ESG Sentiment Score:"
+    SCORE_PATTERN = re.compile(r'ESG Sentiment Score:\s*(\d+\.?\d*)\s*/\s*10')
+    # A score line cut off where the pattern could still continue on the next line
+    SCORE_PREFIX_PATTERN = re.compile(r'ESG Sentiment Score:\s*(?:\d+\.?\d*\s*(?:/\s*)?)?$')
+    NUMBERING_PATTERN = re.compile(r'^\d+\.\s*')
+
+    # Section states
+    PENDING, AWAITING_CONTENT, OPEN, CLOSED = range(4)
+
+    def __init__(self):
+        self.esg_data = {
+            "environment": [],
+            "social": [],
+            "governance": [],
+            "management_remarks": [],
+            "sentiment_score": "N/A"
+        }
+        self._states = {section: self.PENDING for _, section, _ in self.SECTION_HEADERS}
+        self._active = list(self.SECTION_HEADERS)  # Sections that are not closed yet
+        self._score_tail = None
+        self._partial_line = ""
+
+    @property
+    def done(self):
+        """True once every section is closed and the score is found; later input is ignored"""
+        return not self._active and self.esg_data["sentiment_score"] != "N/A"
+
+    def feed(self, chunk):
+        """Consumes a chunk of response text; returns newly completed (section, item) pairs"""
+        if "\n" not in chunk:
+            self._partial_line += chunk
+            return []
+        lines = (self._partial_line + chunk).split("\n")
+        self._partial_line = lines.pop()
+        events = []
+        for line in lines:
+            if self.done:
+                break
+            self._parse_line(line, events)
+        return events
+
+    def close(self):
+        """Parses the trailing unterminated line; returns its (section, item) pairs"""
+        events = []
+        if self._partial_line and not self.done:
+            self._parse_line(self._partial_line, events)
+        self._partial_line = ""
+        return events
+
+    def _add_item(self, section, text, events):
+        items = self.esg_data[section]
+        item = self.NUMBERING_PATTERN.sub('', text)
+        items.append(item)
+        events.append((section, item))
+        if len(items) >= self.MAX_ITEMS:
+            self._close_section(section)
+
+    def _close_section(self, section):
+        self._states[section] = self.CLOSED
+        self._active = [entry for entry in self._active if entry[1] != section]
+
+    def _parse_line(self, line, events):
+        stripped = line.strip()
+
+        for header, section, terminator in self._active:
+            state = self._states[section]
+            if state == self.PENDING:
+                idx = line.find(header)
+                if idx < 0:
+                    continue
+                # Content starts right after the header, or on the next non-empty line
+                rest = line[idx + len(header):].strip()
+                self._states[section] = self.OPEN if rest else self.AWAITING_CONTENT
+                if rest:
+                    self._add_item(section, rest, events)
+            elif state == self.OPEN and stripped.startswith(terminator):
+                self._close_section(section)
+            elif stripped:
+                self._states[section] = self.OPEN
+                self._add_item(section, stripped, events)
+
+        if self.esg_data["sentiment_score"] == "N/A":
+            self._parse_score(line)
+
+    def _parse_score(self, line):
+        if self._score_tail is not None:
+            candidate = f"{self._score_tail}\n{line}"
+            self._score_tail = None
+            score_match = self.SCORE_PATTERN.match(candidate)
+            if score_match:
+                self.esg_data["sentiment_score"] = score_match.group(1)
+                return
+            if self.SCORE_PREFIX_PATTERN.match(candidate):
+                self._score_tail = candidate
+                return
+
+        if self.SCORE_MARKER not in line:
+            return
+        score_match = self.SCORE_PATTERN.search(line)
+        if score_match:
+            self.esg_data["sentiment_score"] = score_match.group(1)
+            return
+        idx = line.rfind(self.SCORE_MARKER)
+        if self.SCORE_PREFIX_PATTERN.match(line, idx):
+            self._score_tail = line[idx:]
+
+
+def parse_esg_json(api_response):
+    """
+    Decodes and validates a JSON-mode response against the esg_data schema in one pass
+    :return: (esg_data, sections that are missing or invalid); esg_data is None if the
+             response is not a JSON object
+    """
+    try:
+        decoded = json.loads(JSON_FENCE_PATTERN.sub("", api_response))
+    except ValueError:
+        return None, list(PILLAR_PROMPTS)
+    if not isinstance(decoded, dict):
+        return None, list(PILLAR_PROMPTS)
+
+    esg_data = {
+        "environment": [],
+        "social": [],
+        "governance": [],
+        "management_remarks": [],
+        "sentiment_score": "N/A"
+    }
+    missing = []
+    for section in PILLAR_PROMPTS:
+        items = decoded.get(section)
+        if isinstance(items, list):
+            items = [ESGStreamParser.NUMBERING_PATTERN.sub('', item.strip())
+                     for item in items if isinstance(item, str) and item.strip()]
+        if not items or not isinstance(items, list):
+            missing.append(section)
+            continue
+        esg_data[section] = items[:10]
+
+    score = decoded.get("sentiment_score")
+    if isinstance(score, str):
+        score_match = re.match(r'\s*(\d+\.?\d*)', score)
+        score = float(score_match.group(1)) if score_match else None
+    if isinstance(score, (int, float)) and not isinstance(score, bool) and 0 <= score <= 10:
+        esg_data["sentiment_score"] = f"{score:g}"
+    elif "management_remarks" not in missing:
+        missing.append("management_remarks")
+
+    return esg_data, missing
+
+
+def json_response_complete(response, sections=tuple(PILLAR_PROMPTS)):
+    """Whether a JSON-mode response decodes and validly fills the given sections (see parse_esg_json)"""
+    esg_data, missing = parse_esg_json(response)
+    return esg_data is not None and not set(sections) & set(missing)
+
+
+def analyze_esg_json(text, client, response_cache=None, refresh=False):
+    """
+    JSON output mode: requests the analysis as a JSON object and validates it with
+    parse_esg_json. Sections that are missing or invalid are filled by a targeted repair
+    request for just those sections (sharing the document prefix) rather than a full
+    re-run. A response that is not JSON at all falls back to the text parser. Only
+    responses that fill every section they were asked for are cached, so a bad response
+    or failed repair is retried on the next run rather than replayed from the cache.
+    :return: esg_data dict (same shape as parse_esg_data), or None if the request failed
+    """
+    if not text.strip():
+        print("❌ Error: Cannot send empty text to DeepSeek API!")
+        return None
+
+    # Truncate once, so the repair request shares the first request's document prefix
+    estimator = token_estimator(client)
+    document_text = fit_document(text, estimator.estimate(build_json_prompt("")), estimator)
+    response = analyze_esg_with_deepseek(document_text, client, response_cache=response_cache, refresh=refresh,
+                                         build_prompt=build_json_prompt, prompt_version=f"{PROMPT_VERSION}-json",
+                                         json_output=True, validate=json_response_complete)
+    if response.startswith("DeepSeek API Error"):
+        print(f"❌ JSON analysis failed: {response}")
+        return None
+
+    esg_data, missing = parse_esg_json(response)
+    if esg_data is None:
+        print("⚠️ Response is not valid JSON, falling back to the text parser")
+        esg_data = parse_esg_data(response)
+        missing = [section for section in PILLAR_PROMPTS if not esg_data[section]]
+        if esg_data["sentiment_score"] == "N/A" and "management_remarks" not in missing:
+            missing.append("management_remarks")
+
+    if missing:
+        print(f"🔧 Repairing missing sections: {', '.join(missing)}")
+        repair_response = analyze_esg_with_deepseek(document_text, client, response_cache=response_cache,
+                                                    refresh=refresh,
+                                                    build_prompt=partial(build_json_prompt, sections=missing),
+                                                    prompt_version=f"{PROMPT_VERSION}-json-{'-'.join(missing)}",
+                                                    json_output=True,
+                                                    validate=partial(json_response_complete, sections=missing))
+        repaired, still_missing = parse_esg_json(repair_response)
+        if repaired is None:
+            print(f"⚠️ Repair request failed: {repair_response[:200]}")
+        else:
+            for section in missing:
+                if section not in still_missing:
+                    merge_pillar(esg_data, section, repaired)
+
+    return esg_data
+
+
+def chunk_text(text, chunk_tokens=CHUNK_TOKENS):
+    """
+    Splits document text into chunks of roughly chunk_tokens tokens,
+    breaking on page/paragraph boundaries where possible
+    """
+    max_chars = chunk_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_len = 0
+    for paragraph in text.split("\n\n"):
+        if not paragraph.strip():
+            continue
+        # Hard-split paragraphs that exceed the budget on their own
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)]
+        for piece in pieces:
+            if current and current_len + len(piece) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_len = 0
+            current.append(piece)
+            current_len += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def merge_esg_data(partials, weights=None):
+    """
+    Reduce step: merges per-chunk parse_esg_data results into a single esg_data dict.
+    Insights and remarks are taken round-robin across chunks (so every part of the
+    report is represented), de-duplicated and capped at 10; the sentiment score is
+    the mean of the chunk scores weighted by chunk size.
+    """
+    merged = {
+        "environment": [],
+        "social": [],
+        "governance": [],
+        "management_remarks": [],
+        "sentiment_score": "N/A"
+    }
+
+    for key in ("environment", "social", "governance", "management_remarks"):
+        seen = set()
+        for items in zip_longest(*(partial[key] for partial in partials)):
+            for item in items:
+                normalized = " ".join(item.lower().split()) if item else ""
+                if not normalized or normalized in seen:
+                    continue
+                seen.add(normalized)
+                merged[key].append(item)
+        merged[key] = merged[key][:10]
+
+    weights = weights or [1] * len(partials)
+    scored = [(float(partial["sentiment_score"]), weight)
+              for partial, weight in zip(partials, weights)
+              if partial["sentiment_score"] != "N/A"]
+    if scored:
+        score = sum(s * w for s, w in scored) / sum(w for _, w in scored)
+        merged["sentiment_score"] = f"{round(score, 1):g}"
+
+    return merged
+
+
+def analyze_esg_chunked(text, client, chunk_tokens=CHUNK_TOKENS, max_concurrency=CHUNK_CONCURRENCY,
+                        response_cache=None, refresh=False):
+    """
+    Map-reduce analysis for long reports: the text is split into token-budgeted chunks,
+    each chunk is analyzed concurrently (at most max_concurrency requests in flight),
+    and the parsed partial results are merged with merge_esg_data.
+    :return: Merged esg_data dict (same shape as parse_esg_data), or None if every chunk failed
+    """
+    chunks = chunk_text(text, chunk_tokens)
+    if not chunks:
+        print("❌ Error: Cannot send empty text to DeepSeek API!")
+        return None
+
+    def analyze_chunk(chunk):
+        return analyze_esg_with_deepseek(chunk, client, response_cache=response_cache, refresh=refresh)
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks))) as pool:
+        responses = list(pool.map(analyze_chunk, chunks))
+
+    partials = []
+    weights = []
+    for idx, (chunk, response) in enumerate(zip(chunks, responses), 1):
+        if response.startswith("DeepSeek API Error"):
+            print(f"⚠️ Chunk {idx}/{len(chunks)} failed: {response}")
+            continue
+        partials.append(parse_esg_data(response))
+        weights.append(len(chunk))
+
+    if not partials:
+        print("❌ Chunked analysis failed: no chunk returned insights")
+        return None
+    return merge_esg_data(partials, weights)
+
+
+def iter_pillar_analyses(text, client, max_concurrency=PILLAR_CONCURRENCY, response_cache=None, refresh=False):
+    """
+    Per-pillar analysis: the Environmental, Social, Governance and remarks/score prompts
+    run concurrently over the same document prefix, so latency is that of the slowest
+    pillar rather than the sum. Yields (pillar, parsed esg_data) as each pillar completes;
+    failed pillars are reported and skipped.
+    """
+    if not text.strip():
+        print("❌ Error: Cannot send empty text to DeepSeek API!")
+        return
+
+    # Truncate once, for the longest pillar template, so every request shares the same document prefix
+    estimator = token_estimator(client)
+    template_tokens = max(estimator.estimate(build_pillar_prompt(pillar, "")) for pillar in PILLAR_PROMPTS)
+    document_text = fit_document(text, template_tokens, estimator)
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(PILLAR_PROMPTS))) as pool:
+        futures = {
+            pool.submit(analyze_esg_with_deepseek, document_text, client,
+                        response_cache=response_cache, refresh=refresh,
+                        build_prompt=partial(build_pillar_prompt, pillar),
+                        prompt_version=f"{PROMPT_VERSION}-{pillar}"): pillar
+            for pillar in PILLAR_PROMPTS
+        }
+        for future in as_completed(futures):
+            pillar = futures[future]
+            response = future.result()
+            if response.startswith("DeepSeek API Error"):
+                print(f"⚠️ Pillar '{pillar}' failed: {response}")
+                continue
+            yield pillar, parse_esg_data(response)
+
+
+def merge_pillar(esg_data, pillar, pillar_data):
+    """Copies one pillar's section into esg_data; the remarks pillar also carries the sentiment score"""
+    esg_data[pillar] = pillar_data[pillar]
+    if pillar == "management_remarks":
+        esg_data["sentiment_score"] = pillar_data["sentiment_score"]
+
+
+def analyze_esg_by_pillar(text, client, max_concurrency=PILLAR_CONCURRENCY, response_cache=None, refresh=False):
+    """
+    Runs iter_pillar_analyses and merges the pillars into a single esg_data dict
+    :return: esg_data dict (same shape as parse_esg_data), or None if every pillar failed
+    """
+    esg_data = {
+        "environment": [],
+        "social": [],
+        "governance": [],
+        "management_remarks": [],
+        "sentiment_score": "N/A"
+    }
+    completed = 0
+    for pillar, pillar_data in iter_pillar_analyses(text, client, max_concurrency=max_concurrency,
+                                                    response_cache=response_cache, refresh=refresh):
+        merge_pillar(esg_data, pillar, pillar_data)
+        completed += 1
+
+    if not completed:
+        print("❌ Per-pillar analysis failed: no pillar returned insights")
+        return None
+    return esg_data
@@ -0,0 +1,64 @@
+import os
+import base64
+import mimetypes
+import threading
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(ASSET_DIR, "logo.png")
+APP_CSS_PATH = os.path.join(ASSET_DIR, "app.css")
+REPORT_CSS_PATH = os.path.join(ASSET_DIR, "report.css")
+COMPARISON_JS_PATH = os.path.join(ASSET_DIR, "comparison.js")
+
+
+class AssetCache:
+    """
+    Process-wide cache of static files (logo, stylesheets) in the forms they are used in:
+    raw bytes, text, base64 and data URIs. A lookup costs one os.stat; an entry is
+    reloaded only when the file's modification time or size changes, so edits to an
+    asset show up without a restart.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.loads = 0
+        self._entries = {}  # (path, form) -> ((mtime_ns, size), value)
+        self._lock = threading.Lock()
+
+    def _get(self, path, form, load):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get((path, form))
+        if entry is not None and entry[0] == version:
+            with self._lock:
+                self.hits += 1
+            return entry[1]
+        value = load(path)
+        with self._lock:
+            self._entries[(path, form)] = (version, value)
+            self.loads += 1
+        return value
+
+    def read_bytes(self, path):
+        def load(path):
+            with open(path, "rb") as f:
+                return f.read()
+        return self._get(path, "bytes", load)
+
+    def read_text(self, path):
+        return self._get(path, "text", lambda path: self.read_bytes(path).decode("utf-8"))
+
+    def base64(self, path):
+        """Base64 encoding of the file (str)"""
+        return self._get(path, "base64", lambda path: base64.b64encode(self.read_bytes(path)).decode())
+
+    def data_uri(self, path, mime_type=None):
+        """data: URI embedding the file, e.g. for <img src=...> in self-contained HTML"""
+        mime_type = mime_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return self._get(path, f"uri:{mime_type}", lambda path: f"data:{mime_type};base64,{self.base64(path)}")
+
+    def stats(self):
+        return {"hits": self.hits, "loads": self.loads, "entries": len(self._entries)}
+
+
+# Shared by the Streamlit UI and the report generators, so each asset is read and encoded once per process
+SHARED_ASSET_CACHE = AssetCache()
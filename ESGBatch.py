@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tomllib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ESGExtract import extract_text_from_pdf, DEFAULT_WORKERS
+from ESGCache import PdfTextCache, ResponseCache, hash_file
+from ESGClient import DeepSeekClient, Cassette, DEEPSEEK_API_URL
+from ESGAnalysis import (analyze_esg_with_deepseek, analyze_esg_by_pillar, analyze_esg_json, parse_esg_data,
+                         PROMPT_MAX_CHARS)
+from ESGRubric import score_esg_by_rubric, load_rubric, RUBRIC_PATH
+from ESGReport import generate_html_report
+
+MANIFEST_NAME = "manifest.jsonl"
+CACHE_DIR = ".esg_cache"
+ANALYSIS_WORKERS = 4
+REPORT_HASH_CHARS = 8  # Leading characters of the PDF's SHA-256 in report file names
+
+
+def load_api_key(api_key=None, secrets_path=".streamlit/secrets.toml"):
+    """
+    Resolves the DeepSeek API key: explicit value, then the DEEPSEEK_API_KEY
+    environment variable, then the Streamlit secrets file used by the app
+    """
+    if api_key:
+        return api_key
+    if os.environ.get("DEEPSEEK_API_KEY"):
+        return os.environ["DEEPSEEK_API_KEY"]
+    if os.path.exists(secrets_path):
+        with open(secrets_path, "rb") as f:
+            return tomllib.load(f).get("deepseek", {}).get("api_key")
+    return None
+
+
+def load_manifest(manifest_path):
+    """
+    Reads the run manifest (one JSON record per processed file)
+    :return: Dict of file SHA-256 -> latest record
+    """
+    records = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["sha256"]] = record
+    return records
+
+
+def append_manifest(manifest_path, record):
+    with open(manifest_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def company_name_from_path(pdf_path):
+    """Derives a company name from the PDF file name (e.g. Acme_Corp_2024.pdf -> Acme Corp 2024)"""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return " ".join(stem.replace("_", " ").replace("-", " ").split())
+
+
+def _extract_document(pdf_path, cache_dir, select_tokens, normalize):
+    """Extraction worker: runs in its own process, so pages are extracted serially within it"""
+    text_cache = PdfTextCache(os.path.join(cache_dir, "pdf_text")) if cache_dir else None
+    return extract_text_from_pdf(pdf_path, max_workers=1, max_chars=PROMPT_MAX_CHARS,
+                                 text_cache=text_cache, select_tokens=select_tokens, normalize=normalize)
+
+
+def _analyze_document(text, company_name, client, response_cache, refresh, pillars, json_output, rubric):
+    """Analysis worker: DeepSeek request(s), parsing, rubric scoring and report rendering"""
+    if json_output:
+        esg_data = analyze_esg_json(text, client, response_cache=response_cache, refresh=refresh)
+        if esg_data is None:
+            raise RuntimeError("DeepSeek API Error: JSON analysis failed")
+    elif pillars:
+        esg_data = analyze_esg_by_pillar(text, client, response_cache=response_cache, refresh=refresh)
+        if esg_data is None:
+            raise RuntimeError("DeepSeek API Error: every pillar failed")
+    else:
+        response = analyze_esg_with_deepseek(text, client, response_cache=response_cache, refresh=refresh)
+        if response.startswith("DeepSeek API Error"):
+            raise RuntimeError(response)
+        esg_data = parse_esg_data(response)
+    esg_data["rubric_score"] = f"{score_esg_by_rubric(esg_data, rubric)}"
+    report_file, safe_company_name = generate_html_report(esg_data, company_name)
+    return esg_data, report_file, safe_company_name
+
+
+def run_batch(input_dir, output_dir, client, extract_workers=DEFAULT_WORKERS,
+              analysis_workers=ANALYSIS_WORKERS, cache_dir=CACHE_DIR, refresh=False, select_tokens=None,
+              normalize=True, pillars=False, json_output=False, rubric_path=RUBRIC_PATH):
+    """
+    Analyzes every PDF in input_dir, pipelining CPU-bound extraction (process pool)
+    with network-bound analysis (thread pool) through the given DeepSeekClient.
+    Finished files are recorded in a manifest in output_dir, so an interrupted run
+    resumes where it left off. select_tokens enables relevance-ranked page selection;
+    normalize strips repeated headers/footers before prompting; pillars runs the
+    E, S, G and remarks prompts of each document concurrently; json_output requests
+    validated JSON responses (see ESGAnalysis.analyze_esg_json); rubric_path selects
+    the rubric config used for the rubric score.
+    :return: Dict with counts and throughput figures
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    pdf_paths = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith(".pdf")
+    )
+    pending = []
+    skipped = 0
+    for pdf_path in pdf_paths:
+        file_hash = hash_file(pdf_path)
+        if manifest.get(file_hash, {}).get("status") == "done":
+            skipped += 1
+        else:
+            pending.append((pdf_path, file_hash))
+
+    print(f"📂 {len(pdf_paths)} PDFs found, {skipped} already done, {len(pending)} to process")
+
+    rubric = load_rubric(rubric_path)
+    response_cache = ResponseCache(os.path.join(cache_dir, "llm_responses")) if cache_dir else None
+    stats = {"done": 0, "failed": 0, "skipped": skipped}
+
+    def record(pdf_path, file_hash, status, started, **fields):
+        append_manifest(manifest_path, {
+            "file": os.path.relpath(pdf_path, input_dir),
+            "sha256": file_hash,
+            "status": status,
+            "seconds": round(time.time() - started, 2),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            **fields
+        })
+        stats[status] += 1
+        icon = "✅" if status == "done" else "❌"
+        print(f"{icon} [{stats['done'] + stats['failed']}/{len(pending)}] {os.path.basename(pdf_path)}"
+              + (f": {fields['error']}" if "error" in fields else ""))
+
+    start_time = time.time()
+    queue = iter(pending)
+    # Bound the number of extracted documents waiting for analysis to keep memory flat
+    max_in_flight = extract_workers + 2 * analysis_workers
+    extracting = {}
+    analyzing = {}
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=analysis_workers) as analysis_pool:
+
+        def top_up():
+            while len(extracting) < extract_workers and len(extracting) + len(analyzing) < max_in_flight:
+                item = next(queue, None)
+                if item is None:
+                    return
+                future = extract_pool.submit(_extract_document, item[0], cache_dir, select_tokens, normalize)
+                extracting[future] = (*item, time.time())
+
+        top_up()
+        while extracting or analyzing:
+            finished, _ = wait(list(extracting) + list(analyzing), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in extracting:
+                    pdf_path, file_hash, started = extracting.pop(future)
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        record(pdf_path, file_hash, "failed", started, error=f"Extraction failed: {e}")
+                        continue
+                    if not text.strip():
+                        record(pdf_path, file_hash, "failed", started, error="No text extracted from PDF")
+                        continue
+                    company_name = company_name_from_path(pdf_path)
+                    analysis = analysis_pool.submit(_analyze_document, text, company_name,
+                                                    client, response_cache, refresh, pillars, json_output, rubric)
+                    analyzing[analysis] = (pdf_path, file_hash, started, company_name)
+                else:
+                    pdf_path, file_hash, started, company_name = analyzing.pop(future)
+                    try:
+                        esg_data, report_file, safe_company_name = future.result()
+                        # Names derived from file names can collide (Acme-Corp.pdf, Acme_Corp.pdf): keep them apart by hash
+                        report_path = os.path.join(output_dir,
+                                                   f"ESG_Insights_{safe_company_name}_{file_hash[:REPORT_HASH_CHARS]}.html")
+                        with open(report_path, "wb") as f:
+                            f.write(report_file.getvalue())
+                    except Exception as e:
+                        record(pdf_path, file_hash, "failed", started, error=str(e))
+                        continue
+                    record(pdf_path, file_hash, "done", started,
+                           company=company_name,
+                           report=os.path.basename(report_path),
+                           sentiment_score=esg_data["sentiment_score"],
+                           rubric_score=esg_data["rubric_score"])
+            top_up()
+
+    elapsed_minutes = max(time.time() - start_time, 1e-9) / 60
+    stats["tokens"] = client.tokens_used
+    stats["docs_per_min"] = stats["done"] / elapsed_minutes
+    stats["tokens_per_min"] = client.tokens_used / elapsed_minutes
+
+    print("=" * 50)
+    print(f"✅ Done: {stats['done']}   ❌ Failed: {stats['failed']}   ⏭️ Skipped: {stats['skipped']}")
+    print(f"⏱️ {elapsed_minutes:.2f} min  |  {stats['docs_per_min']:.2f} docs/min  |  "
+          f"{stats['tokens_per_min']:,.0f} tokens/min ({client.tokens_used:,} tokens)")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch ESG analysis for a directory of PDF reports")
+    parser.add_argument("input_dir", help="Directory containing ESG disclosure PDFs")
+    parser.add_argument("-o", "--output-dir", default="esg_reports", help="Where HTML reports and the manifest are written")
+    parser.add_argument("--extract-workers", type=int, default=DEFAULT_WORKERS, help="Processes used for PDF text extraction")
+    parser.add_argument("--analysis-workers", type=int, default=ANALYSIS_WORKERS, help="Concurrent DeepSeek requests")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Extraction/response cache directory ('' to disable)")
+    parser.add_argument("--select-tokens", type=int, help="Keep only the most ESG-relevant pages that fit in this token budget")
+    parser.add_argument("--no-normalize", action="store_true", help="Keep repeated headers/footers and whitespace")
+    parser.add_argument("--pillars", action="store_true", help="Run the E, S, G and remarks prompts concurrently per document")
+    parser.add_argument("--json", action="store_true", help="Request validated JSON output, repairing missing sections")
+    parser.add_argument("--rubric", default=RUBRIC_PATH, help="Rubric config file (weights, thresholds, keywords)")
+    parser.add_argument("--refresh", action="store_true", help="Bypass cached DeepSeek responses")
+    parser.add_argument("--api-key", help="DeepSeek API key (defaults to DEEPSEEK_API_KEY or .streamlit/secrets.toml)")
+    parser.add_argument("--api-url", default=DEEPSEEK_API_URL, help="Chat-completions endpoint (e.g. a local ESGMockServer)")
+    parser.add_argument("--cassette", help="Record/replay file for API exchanges")
+    parser.add_argument("--cassette-mode", choices=["record", "replay"], default="replay")
+    args = parser.parse_args(argv)
+
+    api_key = load_api_key(args.api_key)
+    if not api_key:
+        print("❌ Error: No DeepSeek API key found")
+        return 1
+
+    cassette = Cassette(args.cassette, args.cassette_mode) if args.cassette else None
+    client = DeepSeekClient(api_key, api_url=args.api_url, cassette=cassette)
+    stats = run_batch(args.input_dir, args.output_dir, client,
+                      extract_workers=args.extract_workers,
+                      analysis_workers=args.analysis_workers,
+                      cache_dir=args.cache_dir or None,
+                      refresh=args.refresh,
+                      select_tokens=args.select_tokens,
+                      normalize=not args.no_normalize,
+                      pillars=args.pillars,
+                      json_output=args.json,
+                      rubric_path=args.rubric)
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
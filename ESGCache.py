@@ -0,0 +1,253 @@
+import os
+import json
+import zlib
+import mmap
+import hashlib
+import tempfile
+import time
+import threading
+import fitz  # PyMuPDF for PDF extraction
+from functools import lru_cache
+from ESGExtract import iter_pages, read_outline, DEFAULT_WORKERS
+
+EXTRACTOR_VERSION = 1  # Bump when extraction output changes to invalidate cached text
+COMPRESSION_LEVEL = 6
+
+
+def hash_file(path):
+    """SHA-256 hex digest of a file, hashed through a read-only memory map"""
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=256)
+def _hash_file(path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Directory-backed key/value store for zlib-compressed blobs.
+    Entries are evicted least-recently-used first once the directory exceeds max_bytes;
+    recency is tracked through file modification times, so it survives restarts.
+    """
+
+    def __init__(self, directory, max_bytes, suffix=".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = zlib.decompress(f.read())
+            os.utime(path)  # Mark as recently used
+        except (OSError, zlib.error):
+            return None
+        return data
+
+    def get(self, key):
+        """Returns the cached bytes for key, or None on a miss"""
+        data = self._load(key)
+        self._count("misses" if data is None else "hits")
+        return data
+
+    def put(self, key, data):
+        """Stores bytes under key (atomically), then evicts old entries if over budget"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data, COMPRESSION_LEVEL))
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"⚠️ Cache write failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Removes least-recently-used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and current on-disk usage"""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+
+class PdfTextCache(DiskCache):
+    """
+    Content-addressed cache of extracted PDF text, keyed by the SHA-256 of the PDF
+    bytes plus the extractor settings. Stores per-page text so a repeat upload
+    never opens the document with PyMuPDF.
+    """
+
+    def __init__(self, directory=".esg_cache/pdf_text", max_bytes=256 * 1024 * 1024):
+        super().__init__(directory, max_bytes, suffix=".pages.zz")
+
+    def key(self, pdf_path, max_pages=None):
+        settings = json.dumps({
+            "extractor": EXTRACTOR_VERSION,
+            "pymupdf": fitz.VersionBind,
+            "mode": "text",
+            "max_pages": max_pages,
+        }, sort_keys=True)
+        return hashlib.sha256(f"{hash_file(pdf_path)}:{settings}".encode()).hexdigest()
+
+    def get_pages(self, key):
+        """Returns the cached entry ({"pages", "next_page", "complete"}) or None"""
+        data = self.get(key)
+        if data is None:
+            return None
+        entry = json.loads(data)
+        entry["pages"] = [tuple(page) for page in entry["pages"]]
+        return entry
+
+    def put_pages(self, key, pages, next_page, complete):
+        entry = {"pages": pages, "next_page": next_page, "complete": complete}
+        self.put(key, json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def outline(self, pdf_path):
+        """Returns the PDF outline (see ESGExtract.read_outline), cached alongside the page text"""
+        key = f"{self.key(pdf_path)}-outline"
+        data = self.get(key)
+        if data is not None:
+            return json.loads(data)
+        outline = read_outline(pdf_path)
+        self.put(key, json.dumps(outline, ensure_ascii=False).encode("utf-8"))
+        return outline
+
+    def iter_pages(self, pdf_path, max_workers=DEFAULT_WORKERS, max_pages=None):
+        """
+        Drop-in replacement for ESGExtract.iter_pages that serves pages from the cache.
+        Pages extracted on a miss are recorded and stored when iteration ends; if the
+        consumer stopped early, the stored prefix is resumed from on the next request.
+        """
+        key = self.key(pdf_path, max_pages)
+        entry = self.get_pages(key)
+        pages = []
+        next_page = 0
+        if entry:
+            pages, next_page = entry["pages"], entry["next_page"]
+            yield from pages
+            if entry["complete"]:
+                return
+
+        cached_count = len(pages)
+        complete = False
+        try:
+            for page_num, page_text in iter_pages(pdf_path, max_workers=max_workers,
+                                                  max_pages=max_pages, start_page=next_page):
+                pages.append((page_num, page_text))
+                next_page = page_num + 1
+                yield page_num, page_text
+            complete = True
+        finally:
+            if complete or len(pages) > cached_count:
+                self.put_pages(key, pages, next_page, complete)
+
+
+class ResponseCache(DiskCache):
+    """
+    Persistent cache of LLM responses keyed by the normalized document text hash,
+    prompt-template version and model parameters. Entries expire after ttl seconds
+    and are otherwise evicted least-recently-used under max_bytes.
+    """
+
+    def __init__(self, directory=".esg_cache/llm_responses", max_bytes=64 * 1024 * 1024, ttl=7 * 24 * 3600):
+        super().__init__(directory, max_bytes, suffix=".response.zz")
+        self.ttl = ttl
+        self.bypasses = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def key(text, prompt_version, model, temperature, max_tokens):
+        normalized = " ".join(text.split())
+        text_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        params = json.dumps({
+            "prompt_version": prompt_version,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }, sort_keys=True)
+        return hashlib.sha256(f"{text_hash}:{params}".encode()).hexdigest()
+
+    def get_response(self, key, refresh=False):
+        """
+        Returns the cached response text, or None on a miss, an expired entry or refresh=True
+        """
+        if refresh:
+            self._count("bypasses")
+            return None
+        data = self._load(key)
+        entry = json.loads(data) if data is not None else None
+        if entry and self.ttl is not None and time.time() - entry["created"] > self.ttl:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            entry = None
+        if entry is None:
+            self._count("misses")
+            return None
+        with self._lock:
+            self.hits += 1
+            self.tokens_saved += entry["usage"].get("total_tokens", 0)
+        return entry["response"]
+
+    def put_response(self, key, response, usage=None):
+        entry = {"response": response, "usage": usage or {}, "created": time.time()}
+        self.put(key, json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def stats(self):
+        stats = super().stats()
+        stats["bypasses"] = self.bypasses
+        stats["tokens_saved"] = self.tokens_saved
+        return stats
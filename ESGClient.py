@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import hashlib
+import random
+import threading
+import requests
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+# Point at a local stand-in (see ESGMockServer) with DEEPSEEK_API_URL=http://127.0.0.1:8787/v1/chat/completions
+DEEPSEEK_API_URL = os.environ.get("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # Seconds
+BACKOFF_MAX = 30.0  # Seconds
+CONNECT_TIMEOUT = 10  # Seconds
+READ_TIMEOUT = 120  # Seconds
+POOL_SIZE = 16  # Keep-alive connections per host
+
+RATE_LIMIT_PER_SECOND = 2.0  # Sustained request rate across the whole process
+RATE_LIMIT_BURST = 8
+
+
+class DeepSeekAPIError(Exception):
+    """Raised when the DeepSeek API returns an error or cannot be reached after retries"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter: allows bursts of up to `capacity`
+    requests and refills at `rate` tokens per second.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` tokens are available, then consumes them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared by every client in the process, so concurrent Streamlit sessions draw from one budget
+SHARED_RATE_LIMITER = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+
+def parse_retry_after(value):
+    """Returns the delay in seconds from a Retry-After header (seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Cassette:
+    """
+    Record/replay store for API exchanges, matched on a hash of the canonical request payload.
+    In "record" mode every successful response (or streamed event list) is appended to a
+    JSONL file; in "replay" mode requests are answered from that file without touching the network.
+    """
+
+    def __init__(self, path, mode="replay"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.exchanges = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        exchange = json.loads(line)
+                        self.exchanges[exchange["key"]] = exchange
+
+    @classmethod
+    def from_env(cls):
+        """Cassette configured by DEEPSEEK_CASSETTE (path) and DEEPSEEK_CASSETTE_MODE, or None"""
+        path = os.environ.get("DEEPSEEK_CASSETTE")
+        return cls(path, os.environ.get("DEEPSEEK_CASSETTE_MODE", "replay")) if path else None
+
+    @staticmethod
+    def key(payload):
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def lookup(self, payload):
+        """Returns the recorded exchange for payload; raises DeepSeekAPIError if none was recorded"""
+        exchange = self.exchanges.get(self.key(payload))
+        if exchange is None:
+            raise DeepSeekAPIError(f"No recorded response for this request in cassette {self.path}")
+        return exchange
+
+    def record(self, payload, response=None, events=None):
+        exchange = {"key": self.key(payload), "response": response, "events": events}
+        with self._lock:
+            self.exchanges[exchange["key"]] = exchange
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+
+
+class DeepSeekClient:
+    """
+    Chat-completions client on a pooled keep-alive session, with exponential
+    backoff (full jitter) on retryable errors, Retry-After support, a shared
+    token-bucket rate limiter and separate connect/read timeouts.
+    """
+
+    def __init__(self, api_key, api_url=DEEPSEEK_API_URL, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 rate_limiter=SHARED_RATE_LIMITER, pool_size=POOL_SIZE, cassette=None):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate_limiter = rate_limiter
+        self.cassette = cassette
+        self.tokens_used = 0
+        self._usage_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _record_usage(self, usage):
+        if usage:
+            with self._usage_lock:
+                self.tokens_used += usage.get("total_tokens", 0)
+
+    def post(self, payload, **kwargs):
+        """
+        POSTs a chat-completions payload, retrying retryable failures.
+        :return: requests.Response with status 200
+        :raises DeepSeekAPIError: on a non-retryable error or once retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            retry_after = None
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = DeepSeekAPIError(f"DeepSeek API Request Failed: {e}")
+            else:
+                if response.status_code == 200:
+                    return response
+                error = DeepSeekAPIError(f"API Error: {response.status_code}, Response: {response.text}",
+                                         status_code=response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    raise error
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.close()
+
+            if attempt == self.max_retries:
+                raise error
+            delay = self._backoff(attempt, retry_after)
+            print(f"⚠️ {error} (retry {attempt + 1}/{self.max_retries} in {delay:.1f}s)")
+            time.sleep(delay)
+
+    def chat(self, payload):
+        """
+        Sends a chat-completions request and returns the decoded JSON response
+        :raises DeepSeekAPIError: see post()
+        """
+        if self.cassette is not None and self.cassette.replaying:
+            response_data = self.cassette.lookup(payload)["response"]
+        else:
+            response_data = self.post(payload).json()
+            if self.cassette is not None:
+                self.cassette.record(payload, response=response_data)
+        self._record_usage(response_data.get("usage"))
+        return response_data
+
+    def stream_chat(self, payload):
+        """
+        Sends a streaming chat-completions request and yields each server-sent event
+        as a decoded JSON dict (content deltas, then a final usage chunk if available).
+        A stream counts as complete once it sends [DONE] or a finish_reason; one that
+        ends before that (e.g. a dropped connection) raises after its last event, so
+        callers never mistake a truncated response for a whole one. Only complete
+        streams are recorded to the cassette.
+        :raises DeepSeekAPIError: see post(); also for malformed events and incomplete streams
+        """
+        payload = dict(payload, stream=True, stream_options={"include_usage": True})
+        if self.cassette is not None and self.cassette.replaying:
+            for event in self.cassette.lookup(payload)["events"]:
+                self._record_usage(event.get("usage"))
+                yield event
+            return
+
+        events = []
+        completed = False
+        with self.post(payload, stream=True) as response:
+            try:
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        completed = True
+                        break
+                    try:
+                        event = json.loads(data)
+                    except ValueError as e:
+                        raise DeepSeekAPIError(f"DeepSeek API sent a malformed stream event: {e}")
+                    self._record_usage(event.get("usage"))
+                    completed = completed or any(choice.get("finish_reason") for choice in event.get("choices") or [])
+                    events.append(event)
+                    yield event
+            except requests.RequestException as e:
+                raise DeepSeekAPIError(f"DeepSeek API stream interrupted: {e}")
+        if not completed:
+            raise DeepSeekAPIError("DeepSeek API stream ended before the response was complete")
+        if self.cassette is not None:
+            self.cassette.record(payload, events=events)
@@ -1,155 +1,23 @@
+import io
 import os
 import re
-from bs4 import BeautifulSoup
 from datetime import datetime
+from html.parser import HTMLParser
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from ESGAssets import SHARED_ASSET_CACHE, COMPARISON_JS_PATH
+from ESGTemplate import Template, stylesheet, encode_parts, script_json
+from ESGReport import read_report_data
 
-def generate_comparison_html(esg_reports):
-    """
-    Generates an HTML comparison table for up to 5 ESG reports
-    :param esg_reports: List of dictionaries containing ESG data from reports
-    :return: Filename of the generated HTML file
-    """
-    if not esg_reports or len(esg_reports) > 5:
-        print("❌ Error: Please provide between 1 and 5 reports for comparison")
-        return None
-    
-    # Create safe filename
-    output_file = "ESG_Comparison.html"
-    current_date = datetime.now().strftime("%B %d, %Y")
-    
-    # Extract company names and scores
-    company_names = [report['company_name'] for report in esg_reports]
-    sentiment_scores = [report['sentiment_score'] for report in esg_reports]
-    
-    # Calculate dynamic column widths
-    num_companies = len(company_names)
-    first_col_width = "12%"  # Reduced from 30% to 12% (60% reduction)
-    other_col_width = f"{(88/num_companies):.2f}%"  # Distribute remaining 88% space
-    
-    # Generate comparison tables for E, S, G
-    def generate_comparison_section(title, icon, category):
-        section_html = f"""
-            <h2><span class="category-icon">{icon}</span>{title} Comparison</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th width="{first_col_width}">Insight</th>
-        """
-        
-        # Add company headers with dynamic width
-        for name in company_names:
-            section_html += f'<th width="{other_col_width}">{name}</th>'
-        section_html += "</tr></thead><tbody>"
-        
-        # Find maximum number of insights across all reports for this category
-        max_insights = max(len(report[category]) for report in esg_reports)
-        
-        # Add insights (up to 10 per category)
-        for i in range(min(10, max_insights)):
-            section_html += f'<tr><td>Insight {i+1}</td>'
-            for report in esg_reports:
-                # Get the insight if it exists, otherwise use "N/A"
-                insight = report[category][i] if i < len(report[category]) else "N/A"
-                section_html += f'<td>{insight}</td>'
-            section_html += '</tr>'
-        
-        section_html += "</tbody></table>"
-        return section_html
-    
-    # Build the complete HTML content
-    html_content = f"""
+COMPARISON_HEAD = Template("""
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>ESG Comparison Report</title>
-        <style>
-            body {{ 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                background-color: #f9f9f9;
-                padding: 0;
-                margin: 0;
-            }}
-            .container {{
-                max-width: 1000px;
-                margin: 20px auto;
-                background: white;
-                padding: 30px;
-                border-radius: 8px;
-                box-shadow: 0 0 20px rgba(0,0,0,0.1);
-            }}
-            header {{
-                border-bottom: 2px solid #2196F3;
-                padding-bottom: 20px;
-                margin-bottom: 30px;
-            }}
-            h1, h2, h3 {{
-                color: #2c3e50;
-            }}
-            h1 {{
-                margin-top: 0;
-                font-size: 2.2em;
-            }}
-            h2 {{
-                border-bottom: 1px solid #eee;
-                padding-bottom: 8px;
-                margin-top: 30px;
-                font-size: 1.5em;
-                color: #2196F3;
-            }}
-            h3.subtitle {{
-                color: #7f8c8d;
-                font-weight: normal;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 20px 0;
-                font-size: 0.95em;
-            }}
-            th, td {{
-                border: 1px solid #ddd;
-                padding: 12px 15px;
-                text-align: left;
-            }}
-            th {{
-                background-color: #2196F3;
-                color: white;
-                font-weight: bold;
-            }}
-            tr:nth-child(even) {{
-                background-color: #f2f2f2;
-            }}
-            tr:hover {{
-                background-color: #e3f2fd;
-            }}
-            .sentiment {{
-                font-size: 1.2em;
-                padding: 10px 15px;
-                background-color: #e8f5e9;
-                border-radius: 4px;
-                display: inline-block;
-                margin: 10px 0;
-            }}
-            .score-table {{
-                margin-bottom: 40px;
-            }}
-            footer {{
-                margin-top: 40px;
-                text-align: center;
-                font-size: 0.9em;
-                color: #7f8c8d;
-                border-top: 1px solid #eee;
-                padding-top: 20px;
-            }}
-            .category-icon {{
-                font-size: 1.2em;
-                margin-right: 8px;
-            }}
-        </style>
+        <style>{stylesheet}</style>
     </head>
     <body>
         <div class="container">
@@ -167,107 +35,552 @@ def generate_comparison_html(esg_reports):
                     </tr>
                 </thead>
                 <tbody>
-    """
-    
-    # Add score comparison
-    for name, score in zip(company_names, sentiment_scores):
-        html_content += f"""
+    """)
+
+SCORE_ROW = Template("""
                     <tr>
                         <td>{name}</td>
                         <td>{score}/10</td>
                     </tr>
-        """
-    
-    html_content += """
+        """)
+
+SCORE_TABLE_TAIL = """
                 </tbody>
             </table>
     """
-    
-    # Add comparison sections
-    html_content += generate_comparison_section("Environmental", "🌍", "environment")
-    html_content += generate_comparison_section("Social", "🏢", "social")
-    html_content += generate_comparison_section("Governance", "🏛", "governance")
-    
-    # Footer
-    html_content += f"""
+
+COMPARISON_SECTION_HEAD = Template("""
+            <h2><span class="category-icon">{icon}</span>{title} Comparison</h2>
+            <table>
+                <thead>
+                    <tr>
+                        <th width="{first_col_width}">Insight</th>
+        """)
+
+COMPANY_HEADER = Template('<th width="{width}">{name}</th>')
+
+COMPARISON_FOOTER = Template("""
             <footer>
                 ESG Comparison Report generated on {current_date}<br>
                 </footer>
         </div>
     </body>
     </html>
+    """)
+
+SCORE_TABLE_CSS = """.score-table {
+    margin-bottom: 40px;
+}
+"""
+
+# Companies-as-rows layout for larger peer sets (see render_comparison_table_html and comparison.js)
+COMPARISON_TABLE_HEAD = Template("""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>ESG Comparison Report</title>
+        <style>{stylesheet}</style>
+        <script type="application/json" id="esg-comparison-data">{dataset}</script>
+    </head>
+    <body>
+        <div class="container">
+            <header>
+                <h1>ESG Comparison Report</h1>
+                <h3 class="subtitle">Generated on: {current_date}</h3>
+                <div class="sentiment">
+                    <strong>Companies:</strong> {company_count} |
+                    <strong>Average ESG Sentiment Score:</strong> {average_score}/10 |
+                    <strong>Range:</strong> {score_range}
+                </div>
+            </header>
+
+            <h2>📊 Overall ESG Comparison</h2>
+            <div class="comparison-controls">
+                <input type="search" id="company-filter" placeholder="Filter companies...">
+                <label>Minimum score <input type="number" id="min-score" min="0" max="10" step="0.5"></label>
+                <label>Rows per page
+                    <select id="page-size">
+                        <option>25</option>
+                        <option selected>50</option>
+                        <option>100</option>
+                        <option>250</option>
+                    </select>
+                </label>
+            </div>
+            <table id="comparison-table" class="score-table">
+                <thead>
+                    <tr>
+                        <th data-sort="company_name" width="28%">Company</th>
+                        <th data-sort="sentiment_score" width="18%">ESG Sentiment Score</th>
+                        <th data-sort="environment">🌍 Environmental</th>
+                        <th data-sort="social">🏢 Social</th>
+                        <th data-sort="governance">🏛 Governance</th>
+                    </tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+            <div class="comparison-pager">
+                <button id="prev-page">&lsaquo; Previous</button>
+                <span id="page-info"></span>
+                <button id="next-page">Next &rsaquo;</button>
+            </div>
+            <noscript>JavaScript is required to display the comparison table.</noscript>
+    """)
+
+COMPARISON_TABLE_SCRIPT = Template("""
+        <script>{script}</script>
+    """)
+
+COMPARISON_TABLE_CSS = """.comparison-controls {
+    display: flex;
+    gap: 20px;
+    align-items: center;
+    flex-wrap: wrap;
+}
+.comparison-controls input, .comparison-controls select {
+    padding: 6px 8px;
+    border: 1px solid #ddd;
+    border-radius: 4px;
+}
+th[data-sort] {
+    cursor: pointer;
+    user-select: none;
+}
+th.sorted-asc::after {
+    content: " \\25B2";
+}
+th.sorted-desc::after {
+    content: " \\25BC";
+}
+tr.company-row {
+    cursor: pointer;
+}
+tr.company-row.expanded {
+    background-color: #e3f2fd;
+}
+tr.detail-row td {
+    vertical-align: top;
+    font-size: 0.9em;
+}
+.comparison-pager {
+    display: flex;
+    gap: 15px;
+    align-items: center;
+    justify-content: center;
+}
+"""
+
+COMPARISON_MAX_COLUMNS = 5  # Above this many companies, companies are laid out as rows
+COMPARISON_FILE = "ESG_Comparison.html"  # Default output of the command-line tool
+
+# (esg_data key, title, icon)
+COMPARISON_SECTIONS = (
+    ("environment", "Environmental", "🌍"),
+    ("social", "Social", "🏢"),
+    ("governance", "Governance", "🏛"),
+)
+MAX_COMPARISON_INSIGHTS = 10
+
+# Legacy-report scraping: section icons in the <h2> headings, and title suffixes stripped from the <h1>
+SECTION_ICONS = {"environment": "🌍", "social": "🏢", "governance": "🏛"}
+REPORT_TITLE_SUFFIXES = ("ESG Insights Report", "ESG Report Analysis")
+
+# --- Ingestion Settings ---
+INGEST_WORKERS = max(1, min(8, os.cpu_count() or 1))
+INGEST_BATCH_SIZE = 64  # Uploaded files read into memory and parsed per batch
+MIN_REPORTS_FOR_POOL = 16  # Below this, a process pool costs more than it saves
+
+
+def render_comparison_section(out, title, icon, category, esg_reports, first_col_width, other_col_width):
+    """Appends one E/S/G comparison table (insights as rows, companies as columns) to the list out"""
+    COMPARISON_SECTION_HEAD.render_into(out, icon=icon, title=title, first_col_width=first_col_width)
+    for report in esg_reports:
+        COMPANY_HEADER.render_into(out, width=other_col_width, name=report['company_name'])
+    out.append("</tr></thead><tbody>")
+
+    # Add insights (up to 10 per category), "N/A" where a report has fewer
+    max_insights = max(len(report[category]) for report in esg_reports)
+    for i in range(min(MAX_COMPARISON_INSIGHTS, max_insights)):
+        out.append(f'<tr><td>Insight {i+1}</td>')
+        for report in esg_reports:
+            insights = report[category]
+            out.append(f'<td>{insights[i] if i < len(insights) else "N/A"}</td>')
+        out.append('</tr>')
+    out.append("</tbody></table>")
+
+
+def render_comparison_html(esg_reports, current_date=None):
     """
-    
+    Renders the comparison from the precompiled templates
+    :param esg_reports: List of dictionaries containing ESG data from reports
+    :return: List of HTML pieces, in document order
+    """
+    current_date = current_date or datetime.now().strftime("%B %d, %Y")
+
+    # First column at 12%, the remaining 88% shared between companies
+    first_col_width = "12%"
+    other_col_width = f"{(88/len(esg_reports)):.2f}%"
+
+    out = []
+    COMPARISON_HEAD.render_into(out, stylesheet=stylesheet(SCORE_TABLE_CSS), current_date=current_date)
+    for report in esg_reports:
+        SCORE_ROW.render_into(out, name=report['company_name'], score=report['sentiment_score'])
+    out.append(SCORE_TABLE_TAIL)
+
+    for category, title, icon in COMPARISON_SECTIONS:
+        render_comparison_section(out, title, icon, category, esg_reports, first_col_width, other_col_width)
+
+    COMPARISON_FOOTER.render_into(out, current_date=current_date)
+    return out
+
+
+def comparison_frame(esg_reports):
+    """
+    Columnar view of the comparison: one row per company
+    :param esg_reports: List of dictionaries containing ESG data from reports
+    :return: DataFrame with company_name, sentiment_score (float, NaN when missing) and
+             the environment/social/governance insight lists
+    """
+    frame = pd.DataFrame.from_records(esg_reports, columns=["company_name", "sentiment_score",
+                                                            *(section for section, _, _ in COMPARISON_SECTIONS)])
+    frame["sentiment_score"] = pd.to_numeric(frame["sentiment_score"], errors="coerce")
+    for section, _, _ in COMPARISON_SECTIONS:
+        frame[section] = [insights[:MAX_COMPARISON_INSIGHTS] if isinstance(insights, list) else []
+                          for insights in frame[section]]
+    return frame
+
+
+def comparison_dataset(frame, current_date):
+    """The embedded dataset: the frame's columns as lists (JSON null for missing scores)"""
+    scores = frame["sentiment_score"]
+    columns = {column: frame[column].tolist() for column in frame.columns}
+    columns["sentiment_score"] = [None if missing else score for score, missing in zip(scores.tolist(), scores.isna())]
+    return {"version": 1, "generated_on": current_date, "columns": columns}
+
+
+def render_comparison_table_html(esg_reports, current_date=None):
+    """
+    Renders the companies-as-rows comparison. Only a page shell is static HTML: the
+    data is embedded once as a columnar JSON dataset, and comparison.js renders the
+    visible page of rows with client-side sorting and filtering, so size and render
+    time grow linearly with the number of companies.
+    :param esg_reports: List of dictionaries containing ESG data from reports
+    :return: List of HTML pieces, in document order
+    """
+    current_date = current_date or datetime.now().strftime("%B %d, %Y")
+    frame = comparison_frame(esg_reports)
+    scores = frame["sentiment_score"].dropna()
+
+    out = []
+    COMPARISON_TABLE_HEAD.render_into(
+        out,
+        stylesheet=stylesheet(SCORE_TABLE_CSS, COMPARISON_TABLE_CSS),
+        dataset=script_json(comparison_dataset(frame, current_date)),
+        current_date=current_date,
+        company_count=len(frame),
+        average_score=f"{scores.mean():.1f}" if len(scores) else "N/A",
+        score_range=f"{scores.min():g} - {scores.max():g}" if len(scores) else "N/A"
+    )
+    COMPARISON_TABLE_SCRIPT.render_into(out, script=SHARED_ASSET_CACHE.read_text(COMPARISON_JS_PATH))
+    COMPARISON_FOOTER.render_into(out, current_date=current_date)
+    return out
+
+
+def generate_comparison_html(esg_reports, output_file=None):
+    """
+    Generates an HTML comparison of ESG reports: companies side by side for up to
+    COMPARISON_MAX_COLUMNS reports, a sortable, paginated table of companies beyond that.
+    The comparison is built in memory, so concurrent callers never share a file.
+    :param esg_reports: List of dictionaries containing ESG data from reports
+    :param output_file: Optional path to also write the comparison to
+    :return: BytesIO with the HTML, or output_file when given (None if there is nothing to compare)
+    """
+    if not esg_reports:
+        print("❌ Error: Please provide at least one report for comparison")
+        return None
+
+    if len(esg_reports) <= COMPARISON_MAX_COLUMNS:
+        html_parts = render_comparison_html(esg_reports)
+    else:
+        html_parts = render_comparison_table_html(esg_reports)
+    html_bytes = encode_parts(html_parts)
+
+    if output_file is None:
+        return io.BytesIO(html_bytes)
+
     # Save file
-    with open(output_file, "w", encoding="utf-8") as file:
-        file.write(html_content)
-    
+    with open(output_file, "wb") as file:
+        file.write(html_bytes)
+
     print(f"✅ ESG Comparison Report generated: {output_file}")
     return output_file
 
-def extract_data_from_html(html_file):
+
+def comparison_data_from_report(html_text):
     """
-    Extracts ESG data from a single HTML report file using BeautifulSoup
-    :param html_file: Path to HTML file
+    Builds the comparison record from a report's data island (see ESGReport.read_report_data)
+    :return: Dictionary with extracted data, or None when the report has no data island
+    """
+    payload = read_report_data(html_text)
+    if payload is None:
+        return None
+    esg_data = payload["esg_data"]
+    return {
+        'company_name': payload["company_name"],
+        'sentiment_score': esg_data.get('sentiment_score', "N/A"),
+        'environment': esg_data.get('environment', [])[:MAX_COMPARISON_INSIGHTS],
+        'social': esg_data.get('social', [])[:MAX_COMPARISON_INSIGHTS],
+        'governance': esg_data.get('governance', [])[:MAX_COMPARISON_INSIGHTS]
+    }
+
+
+class _StopScraping(Exception):
+    pass
+
+
+class ReportScraper(HTMLParser):
+    """
+    Single forward pass over a report's HTML (stdlib streaming parser, no DOM): collects
+    the header title, subtitle, sentiment box and, for each pillar, the rows of the first
+    table after the first <h2> mentioning the pillar's icon. Feeding stops as soon as
+    everything has been found.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None  # First <h1> inside the first <header>
+        self.first_h1 = None
+        self.subtitle = None
+        self.sentiment = None
+        self.rows = dict.fromkeys(SECTION_ICONS)  # section -> [[cell text, ...], ...] once its table closed
+        self._headed = set()  # Sections whose <h2> has been seen
+        self._waiting = []  # Sections whose <h2> was seen, waiting for the next <table>
+        self._header = None  # None before the first <header>, then its nesting depth; False once closed
+        self._captures = []  # Open text captures: [tag, nesting depth, text pieces, callback]
+        self._table = None  # Table being collected: {"sections", "depth", "rows", "row"}
+
+    def _capture(self, tag, callback):
+        self._captures.append([tag, 0, [], callback])
+
+    def handle_starttag(self, tag, attrs):
+        for capture in self._captures:
+            if capture[0] == tag:
+                capture[1] += 1
+
+        if tag == "header" and self._header is not False:
+            self._header = 1 if self._header is None else self._header + 1
+        elif tag == "h1":
+            if self.first_h1 is None:
+                self._capture(tag, lambda text: setattr(self, "first_h1", text))
+            if self._header and self.title is None:
+                self._capture(tag, lambda text: setattr(self, "title", text))
+        elif tag == "h2":
+            self._capture(tag, self._heading)
+        elif tag == "h3" and self.subtitle is None and "subtitle" in _classes(attrs):
+            self._capture(tag, lambda text: setattr(self, "subtitle", text))
+        elif tag == "div" and self.sentiment is None and "sentiment" in _classes(attrs):
+            self._capture(tag, lambda text: setattr(self, "sentiment", text))
+        elif tag == "table":
+            if self._table is not None:
+                self._table["depth"] += 1
+            elif self._waiting:
+                self._table = {"sections": self._waiting, "depth": 1, "rows": [], "row": None}
+                self._waiting = []
+        elif self._table is not None and self._table["depth"] == 1:  # Rows of nested tables are not collected
+            if tag == "tr":
+                self._table["row"] = []
+            elif tag == "td" and self._table["row"] is not None:
+                self._capture(tag, self._table["row"].append)
+
+    def handle_endtag(self, tag):
+        for capture in list(self._captures):
+            if capture[0] == tag:
+                if capture[1]:
+                    capture[1] -= 1
+                else:
+                    self._captures.remove(capture)
+                    capture[3]("".join(capture[2]))
+
+        if tag == "header" and self._header:
+            self._header -= 1
+            if not self._header:
+                self._header = False
+        elif tag == "table" and self._table is not None:
+            self._table["depth"] -= 1
+            if not self._table["depth"]:
+                for section in self._table["sections"]:
+                    self.rows[section] = self._table["rows"]
+                self._table = None
+                self._check_done()
+        elif tag == "tr" and self._table is not None and self._table["depth"] == 1:
+            if self._table["row"] is not None:
+                self._table["rows"].append(self._table["row"])
+            self._table["row"] = None
+
+    def handle_data(self, data):
+        for capture in self._captures:
+            capture[2].append(data)
+
+    def _heading(self, text):
+        for section, icon in SECTION_ICONS.items():
+            if section not in self._headed and icon in text:
+                self._headed.add(section)
+                self._waiting.append(section)
+
+    def _check_done(self):
+        if (all(rows is not None for rows in self.rows.values())
+                and self.title is not None and self.subtitle is not None and self.sentiment is not None):
+            raise _StopScraping
+
+    def scrape(self, html_text):
+        try:
+            self.feed(html_text)
+            self.close()
+        except _StopScraping:
+            pass
+        return self
+
+
+def _classes(attrs):
+    for name, value in attrs:
+        if name == "class":
+            return (value or "").split()
+    return ()
+
+
+def clean_company_name(title):
+    """Company name from a report title (e.g. "Acme ESG Insights Report" -> "Acme")"""
+    for suffix in REPORT_TITLE_SUFFIXES:
+        title = title.replace(suffix, "")
+    return title.strip()
+
+
+def scrape_report_html(html_text):
+    """
+    Extracts the comparison record from a report's visible HTML in a single pass (see
+    ReportScraper); used for reports generated before the data island existed
     :return: Dictionary with extracted data
     """
-    with open(html_file, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
-    
-    # Extract company name from header
-    header = soup.find('header')
+    scraper = ReportScraper().scrape(html_text)
+
+    # Extract company name from header (any <h1> when there is no header)
     company_name = "Unknown Company"
-    if header:
-        h1 = header.find('h1')
-        if h1:
-            company_name = h1.text.replace('ESG Report Analysis', '').strip()
-    
+    title = scraper.title if scraper.title is not None else scraper.first_h1
+    if title is not None:
+        company_name = clean_company_name(title)
+
     # Extract ticker from subtitle if available
-    subtitle = soup.find('h3', class_='subtitle')
-    if subtitle:
-        subtitle_text = subtitle.get_text()
-        ticker_match = re.search(r'Ticker: (\w+)', subtitle_text)
+    if scraper.subtitle:
+        ticker_match = re.search(r'Ticker: (\w+)', scraper.subtitle)
         if ticker_match:
             company_name = f"{company_name} ({ticker_match.group(1)})"
-    
+
     # Extract sentiment score
     sentiment_score = "N/A"
-    sentiment_div = soup.find('div', class_='sentiment')
-    if sentiment_div:
-        score_match = re.search(r'(\d+(?:\.\d+)?)/10', sentiment_div.get_text())
+    if scraper.sentiment:
+        score_match = re.search(r'(\d+(?:\.\d+)?)/10', scraper.sentiment)
         if score_match:
             sentiment_score = score_match.group(1)
-    
-    # Function to extract insights from a section
-    def extract_insights(section_icon):
-        insights = []
-        # Find the h2 with the matching icon
-        section_header = soup.find(lambda tag: tag.name == 'h2' and section_icon in tag.get_text())
-        if section_header:
-            # Find the next table
-            table = section_header.find_next('table')
-            if table:
-                # Extract all insight rows (skip header row)
-                rows = table.find_all('tr')[1:]  # Skip header row
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:  # Should have at least number and insight
-                        insight = cells[1].get_text().strip()
-                        insights.append(insight)
-        return insights[:10]  # Return max 10 insights
-    
-    # Extract all insights
-    env_insights = extract_insights("🌍")
-    soc_insights = extract_insights("🏢")
-    gov_insights = extract_insights("🏛")
-    
-    return {
-        'company_name': company_name,
-        'sentiment_score': sentiment_score,
-        'environment': env_insights,
-        'social': soc_insights,
-        'governance': gov_insights
-    }
+
+    # Insight text is the second cell of every row after the table's header row
+    report_data = {'company_name': company_name, 'sentiment_score': sentiment_score}
+    for section in SECTION_ICONS:
+        rows = (scraper.rows[section] or [])[1:]
+        report_data[section] = [cells[1].strip() for cells in rows if len(cells) >= 2][:MAX_COMPARISON_INSIGHTS]
+    return report_data
+
+
+def extract_report_data(html_text):
+    """
+    Extracts the comparison record from a report: its data island when present,
+    otherwise its visible HTML (see scrape_report_html)
+    """
+    report_data = comparison_data_from_report(html_text)
+    if report_data is None:
+        report_data = scrape_report_html(html_text)
+    return report_data
+
+
+def extract_data_from_html(html_file):
+    """
+    Extracts ESG data from a single HTML report file (see extract_report_data)
+    :param html_file: Path to HTML file
+    :return: Dictionary with extracted data
+    """
+    with open(html_file, 'r', encoding='utf-8') as f:
+        return extract_report_data(f.read())
+
+
+def _ingest_report(data):
+    """
+    Worker: decodes and extracts one uploaded report
+    :return: (report_data, None) or (None, error message)
+    """
+    try:
+        report_data = extract_report_data(data.decode("utf-8"))
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    if report_data["company_name"] == "Unknown Company" and not any(
+            report_data[section] for section in SECTION_ICONS):
+        return None, "No ESG report data found"
+    return report_data, None
+
+
+def _read_upload(file):
+    if isinstance(file, bytes):
+        return file
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def iter_report_data(files, max_workers=INGEST_WORKERS, batch_size=INGEST_BATCH_SIZE):
+    """
+    Extracts comparison records from many uploaded reports in a process pool.
+    Files are read and parsed batch_size at a time, so memory stays bounded by the
+    batch rather than the upload. A file that cannot be read or parsed is reported
+    with its error and does not affect the others.
+    :param files: List of (name, bytes or binary file-like object, e.g. a Streamlit UploadedFile)
+    :param max_workers: Number of worker processes (1 = parse in this process)
+    :return: Generator of (index in files, name, report_data or None, error or None), in completion order
+    """
+    use_pool = (max_workers or 1) > 1 and len(files) >= MIN_REPORTS_FOR_POOL
+    pool = ProcessPoolExecutor(max_workers=min(max_workers, batch_size)) if use_pool else None
+    try:
+        numbered = enumerate(files)
+        while True:
+            batch = list(islice(numbered, batch_size))
+            if not batch:
+                break
+            if pool is None:
+                for idx, (name, file) in batch:
+                    try:
+                        report_data, error = _ingest_report(_read_upload(file))
+                    except Exception as e:
+                        report_data, error = None, f"{type(e).__name__}: {e}"
+                    yield idx, name, report_data, error
+                continue
+
+            futures = {}
+            for idx, (name, file) in batch:
+                try:
+                    futures[pool.submit(_ingest_report, _read_upload(file))] = (idx, name)
+                except Exception as e:
+                    yield idx, name, None, f"{type(e).__name__}: {e}"
+            for future in as_completed(futures):
+                idx, name = futures[future]
+                try:
+                    report_data, error = future.result()
+                except Exception as e:  # e.g. a worker process died
+                    report_data, error = None, f"{type(e).__name__}: {e}"
+                yield idx, name, report_data, error
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
 
 def create_comparison_report():
     """
@@ -275,7 +588,7 @@ def create_comparison_report():
     """
     print("📊 ESG Comparison Report Generator")
     print("="*50)
-    print("Please enter the names of the ESG insight HTML files you want to compare (1-5 files)")
+    print("Please enter the names of the ESG insight HTML files you want to compare")
     print("Example: ESG_Insights_AAPL.html, ESG_Insights_MSFT.html\n")
     
     while True:
@@ -290,7 +603,7 @@ def create_comparison_report():
         invalid_files = []
         
         # Validate files
-        for f in selected_files[:5]:  # Limit to 5 files
+        for f in selected_files:
             if not f.endswith('.html'):
                 f += '.html'  # Add extension if missing
             
@@ -327,7 +640,7 @@ def create_comparison_report():
         return
     
     # Generate comparison report
-    generate_comparison_html(esg_data)
+    generate_comparison_html(esg_data, COMPARISON_FILE)
 
 if __name__ == "__main__":
     create_comparison_report()
\ No newline at end of file
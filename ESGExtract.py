@@ -0,0 +1,184 @@
+import os
+import shutil
+import tempfile
+import fitz  # PyMuPDF for PDF extraction
+from collections import deque
+from contextlib import closing, contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from ESGText import iter_normalized_pages, select_relevant_pages
+
+DEFAULT_WORKERS = max(1, min(8, os.cpu_count() or 1))
+PAGES_PER_TASK = 16  # Pages extracted per worker task
+MIN_PAGES_FOR_POOL = 2 * PAGES_PER_TASK  # Below this, a process pool costs more than it saves
+SPOOL_CHUNK_SIZE = 1 << 20  # 1 MB
+
+
+@contextmanager
+def spooled_pdf(pdf_file):
+    """
+    Yields a filesystem path for the PDF without holding extra copies in memory.
+    Paths are used as-is; uploaded file objects are spooled to a temporary file
+    (in-memory buffers are written straight from their buffer, others in fixed-size chunks).
+    :param pdf_file: Path or binary file-like object (e.g. a Streamlit UploadedFile)
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        yield os.fspath(pdf_file)
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            pdf_file.seek(0)
+            if hasattr(pdf_file, "getbuffer"):
+                with pdf_file.getbuffer() as buffer:
+                    spool.write(buffer)
+            else:
+                shutil.copyfileobj(pdf_file, spool, SPOOL_CHUNK_SIZE)
+            pdf_file.seek(0)  # Reset file pointer after spooling
+        yield path
+    finally:
+        os.remove(path)
+
+
+def read_outline(pdf_path):
+    """Returns the PDF outline (table of contents) as [level, title, page] entries, pages 1-based"""
+    with fitz.open(pdf_path) as doc:
+        return doc.get_toc(simple=True)
+
+
+def _extract_page_range(pdf_path, start, stop):
+    """
+    Worker: opens the PDF file and extracts pages [start, stop)
+    :return: (list of (page_number, text), list of (page_number, error message))
+    """
+    pages = []
+    errors = []
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, stop):
+            try:
+                pages.append((page_num, doc[page_num].get_text("text")))
+            except Exception as e:
+                errors.append((page_num, str(e)))
+    return pages, errors
+
+
+def _iter_pages_inline(pdf_path, start_page, page_count):
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start_page, page_count):
+            try:
+                yield page_num, doc[page_num].get_text("text")
+            except Exception as e:
+                print(f"⚠️ Error reading page {page_num + 1}: {e}")
+
+
+def iter_pages(pdf_path, max_workers=DEFAULT_WORKERS, max_pages=None, start_page=0):
+    """
+    Lazily yields (page_number, text) for each page, in page order.
+    Page ranges are extracted in worker processes with at most 2 x max_workers
+    ranges in flight, so memory stays bounded regardless of document length.
+    Stopping iteration early cancels the remaining ranges.
+    :param pdf_path: Path to the PDF file (see spooled_pdf for uploads)
+    :param max_workers: Number of worker processes (1 = extract in this process)
+    :param max_pages: Optional cap on the number of pages to extract (None = all pages)
+    :param start_page: First page to extract (used to resume a partially cached document)
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+
+    if (max_workers or 1) <= 1 or page_count - start_page < MIN_PAGES_FOR_POOL:
+        yield from _iter_pages_inline(pdf_path, start_page, page_count)
+        return
+
+    ranges = iter([(start, min(start + PAGES_PER_TASK, page_count))
+                   for start in range(start_page, page_count, PAGES_PER_TASK)])
+    pool = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(pool.submit(_extract_page_range, pdf_path, start, stop))
+            if len(pending) >= 2 * max_workers:
+                break
+
+        while pending:
+            range_pages, range_errors = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append(pool.submit(_extract_page_range, pdf_path, *next_range))
+
+            for page_num, error in range_errors:
+                print(f"⚠️ Error reading page {page_num + 1}: {error}")
+            yield from range_pages
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def extract_pages(pdf_file, max_workers=DEFAULT_WORKERS, max_pages=None):
+    """
+    Extracts every page of a PDF into a list of (page_number, text) tuples in page order
+    :param pdf_file: Path or binary file-like object
+    """
+    with spooled_pdf(pdf_file) as pdf_path:
+        return list(iter_pages(pdf_path, max_workers=max_workers, max_pages=max_pages))
+
+
+def collect_text(pages, max_chars=None, separator="\n\n"):
+    """
+    Joins non-empty page texts from a (page_number, text) iterable, stopping as soon
+    as max_chars is reached so later pages are never extracted
+    :return: Joined document text, at most max_chars long
+    """
+    parts = []
+    total = 0
+    for _, page_text in pages:
+        if not page_text.strip():
+            continue
+        if parts:
+            total += len(separator)
+        if max_chars is not None and total + len(page_text) >= max_chars:
+            parts.append(page_text[:max(0, max_chars - total)])
+            break
+        parts.append(page_text)
+        total += len(page_text)
+    return separator.join(parts)
+
+
+def extract_text_from_pdf(pdf_file, max_workers=DEFAULT_WORKERS, max_pages=None, max_chars=None,
+                          text_cache=None, select_tokens=None, normalize=False, stats=None):
+    """
+    Memory-bounded PDF text extraction; pages are extracted lazily and only until max_chars is filled
+    (with normalize, at most two normalization windows past that point)
+    :param pdf_file: Path or binary file-like object
+    :param text_cache: Optional ESGCache.PdfTextCache to serve and store extracted pages
+    :param select_tokens: If set, every page is extracted and only the most ESG-relevant pages
+                          that fit in this token budget are kept (see ESGText.select_relevant_pages)
+    :param normalize: Strip repeated headers/footers and boilerplate (see ESGText.iter_normalized_pages)
+    :param stats: Optional dict that receives the normalization statistics
+    :return: Document text, or "" if the PDF could not be read
+    """
+    try:
+        # Spool the upload to disk and stream pages from the cache or worker processes
+        with spooled_pdf(pdf_file) as pdf_path:
+            page_source = text_cache.iter_pages if text_cache is not None else iter_pages
+            with closing(page_source(pdf_path, max_workers=max_workers, max_pages=max_pages)) as page_iter:
+                pages = page_iter
+                normalization_stats = {}
+                if normalize:
+                    pages = iter_normalized_pages(pages, stats=normalization_stats)
+                if select_tokens is not None:
+                    outline = text_cache.outline(pdf_path) if text_cache is not None else read_outline(pdf_path)
+                    pages = select_relevant_pages(list(pages), select_tokens, outline=outline)
+                full_text = collect_text(pages, max_chars=max_chars)
+                if normalize:
+                    print(f"🧹 Removed {normalization_stats['chars_removed']:,} chars "
+                          f"(~{normalization_stats['tokens_removed']:,} tokens) of repeated headers/footers and whitespace")
+                    if stats is not None:
+                        stats.update(normalization_stats)
+
+        if not full_text.strip():
+            print("❌ Warning: No text found in PDF. Is this a scanned document?")
+        return full_text
+    except Exception as e:
+        print(f"❌ Error reading PDF file: {e}")
+        return ""
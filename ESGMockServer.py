@@ -0,0 +1,210 @@
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+from flask import Flask, Response, jsonify, request
+
+CHARS_PER_TOKEN = 4
+
+ENVIRONMENT_TEMPLATES = [
+    "Reduced Scope 1 and 2 GHG emissions by {pct}% year-over-year to {num},000 tons CO2e under the Net Zero {year} strategy.",
+    "Renewable energy reached {pct}% of total electricity use, up from {pct2}% in the prior year, through the Green Power program.",
+    "Water withdrawal fell {pct}% to {num} megaliters as part of the Water Stewardship initiative across {num2} sites.",
+    "Diverted {pct}% of operational waste from landfill, with a target of zero waste to landfill by {year}.",
+    "Energy intensity improved {pct}% to {num} kWh per unit of revenue following the Efficiency First plan.",
+    "Set SBTi-validated targets to cut absolute emissions {pct}% by {year} against a 2019 baseline.",
+    "Reported to CDP with an A- climate score and aligned disclosures with TCFD recommendations.",
+    "Invested ${num} million in biodiversity restoration covering {num2} hectares near operating sites.",
+    "Certified {num2} facilities to ISO 14001 environmental management standards.",
+    "Supplier engagement program covered {pct}% of procurement spend for Scope 3 emissions reporting.",
+]
+SOCIAL_TEMPLATES = [
+    "Women represent {pct}% of the global workforce of {num},000 employees and {pct2}% of senior leadership.",
+    "Delivered {num},000 training hours, averaging {num2} hours per employee through the Learning Academy program.",
+    "Lost-time injury frequency rate fell {pct}% to 0.{num2}, supported by the Safety First initiative.",
+    "Employee engagement survey scored {pct}% favorable with a {pct2}% participation rate.",
+    "Community investment totaled ${num} million, including {num2},000 employee volunteering hours.",
+    "Achieved pay equity within {num2}% across gender for comparable roles after the annual pay review.",
+    "Launched the Inclusion Council policy and {num2} employee resource groups across regions.",
+    "Voluntary turnover decreased to {pct}% from {pct2}% in the prior year.",
+    "Supplier code of conduct audits covered {num2} high-risk suppliers under the Responsible Sourcing framework.",
+    "Recognized as a top employer in {num2} countries for workplace practices.",
+]
+GOVERNANCE_TEMPLATES = [
+    "Board comprises {num2} directors, {pct}% independent, with an independent chair.",
+    "Women hold {pct}% of board seats, meeting the board diversity policy target.",
+    "Executive compensation links {pct}% of annual incentives to ESG metrics under the remuneration framework.",
+    "The Audit Committee is fully independent and met {num2} times during the year.",
+    "Enterprise risk management framework integrates climate risk into quarterly reviews.",
+    "Whistleblower hotline received {num2} reports, all investigated under the Speak Up policy.",
+    "Code of Conduct training completed by {pct}% of employees.",
+    "Anti-bribery and corruption policy applies to all third parties, with {num2} due diligence reviews.",
+    "The Sustainability Committee of the board oversees ESG strategy and reports twice a year.",
+    "Cybersecurity program certified to ISO 27001 with annual external audits.",
+]
+REMARK_TEMPLATES = [
+    "\"Sustainability is central to how we create long-term value.\" - Chief Executive Officer",
+    "\"We remain on track to reach net zero by {year}.\" - Chief Sustainability Officer",
+    "\"Our people are our greatest strength, and we keep investing in them.\" - Chief People Officer",
+    "\"Strong governance underpins every decision we make.\" - Chair of the Board",
+    "\"We will double our renewable energy investment over the next {num2} years.\" - Chief Financial Officer",
+]
+
+
+def build_canned_data(prompt, seed=None):
+    """
+    Builds deterministic analysis content (sections, score and justification).
+    The same prompt always yields the same content.
+    """
+    seed = seed if seed is not None else int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+
+    def fill(template):
+        return template.format(pct=rng.randint(5, 60), pct2=rng.randint(5, 60), num=rng.randint(10, 900),
+                               num2=rng.randint(2, 40), year=rng.choice([2030, 2035, 2040, 2050]))
+
+    return {
+        "environment": [fill(template) for template in ENVIRONMENT_TEMPLATES],
+        "social": [fill(template) for template in SOCIAL_TEMPLATES],
+        "governance": [fill(template) for template in GOVERNANCE_TEMPLATES],
+        "management_remarks": [fill(template) for template in REMARK_TEMPLATES],
+        "sentiment_score": rng.randint(5, 9),
+        "justification": "Specific, quantified disclosures with clear targets and governance oversight.",
+    }
+
+
+def build_canned_response(prompt, seed=None):
+    """Renders build_canned_data in the structured text format parse_esg_data expects"""
+    data = build_canned_data(prompt, seed)
+    lines = []
+    for header, section in (("Environmental:", "environment"),
+                            ("Social:", "social"),
+                            ("Governance:", "governance")):
+        lines.append(header)
+        lines.extend(f"{idx}. {item}" for idx, item in enumerate(data[section], 1))
+        lines.append("")
+    lines.append("Key Remarks:")
+    lines.extend(f"{idx}. {item}" for idx, item in enumerate(data["management_remarks"], 1))
+    lines.append("")
+    lines.append(f"ESG Sentiment Score: {data['sentiment_score']}/10")
+    lines.append(f"Justification: {data['justification']}")
+    return "\n".join(lines)
+
+
+def build_canned_json(prompt, seed=None):
+    """Renders build_canned_data as a JSON-mode response"""
+    return json.dumps(build_canned_data(prompt, seed), ensure_ascii=False)
+
+
+def create_app(latency=0.5, tokens_per_second=200.0, error_rate=0.0, error_codes=(429, 500, 503),
+               retry_after=1, response_text=None, seed=0):
+    """
+    Local stand-in for the DeepSeek chat-completions API
+    :param latency: Seconds before the first token
+    :param tokens_per_second: Simulated generation speed (0 = instant)
+    :param error_rate: Fraction of requests answered with an injected error
+    :param error_codes: HTTP status codes used for injected errors
+    :param retry_after: Retry-After seconds sent with injected 429s
+    :param response_text: Fixed response content (default: generated per prompt)
+    :param seed: Seed for error injection, so runs are reproducible
+    """
+    app = Flask(__name__)
+    error_rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0}
+
+    @app.get("/stats")
+    def get_stats():
+        return jsonify(stats)
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    def chat_completions():
+        stats["requests"] += 1
+        payload = request.get_json(force=True)
+
+        if error_rate and error_rng.random() < error_rate:
+            stats["errors"] += 1
+            status = error_rng.choice(list(error_codes))
+            headers = {"Retry-After": str(retry_after)} if status == 429 else {}
+            return jsonify({"error": {"message": "Injected error", "code": status}}), status, headers
+
+        prompt = "".join(message.get("content", "") for message in payload.get("messages", []))
+        if response_text is not None:
+            content = response_text
+        elif (payload.get("response_format") or {}).get("type") == "json_object":
+            content = build_canned_json(prompt)
+        else:
+            content = build_canned_response(prompt)
+        usage = {
+            "prompt_tokens": len(prompt) // CHARS_PER_TOKEN,
+            "completion_tokens": len(content) // CHARS_PER_TOKEN,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = payload.get("model", "deepseek-chat")
+        created = int(time.time())
+
+        if not payload.get("stream"):
+            time.sleep(latency + (usage["completion_tokens"] / tokens_per_second if tokens_per_second else 0))
+            return jsonify({
+                "id": f"mock-{stats['requests']}",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        include_usage = (payload.get("stream_options") or {}).get("include_usage")
+
+        def events():
+            time.sleep(latency)
+            piece_chars = 8 * CHARS_PER_TOKEN
+            for i in range(0, len(content), piece_chars):
+                piece = content[i:i + piece_chars]
+                if tokens_per_second:
+                    time.sleep(len(piece) / CHARS_PER_TOKEN / tokens_per_second)
+                chunk = {"id": f"mock-{stats['requests']}", "object": "chat.completion.chunk",
+                         "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            if include_usage:
+                yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return Response(events(), mimetype="text/event-stream")
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local mock DeepSeek chat-completions server for offline benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Simulated generation speed (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-codes", default="429,500,503", help="Comma-separated status codes for injected errors")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--response-file", help="Serve this file's content instead of generated responses")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    response_text = None
+    if args.response_file:
+        with open(args.response_file, "r", encoding="utf-8") as f:
+            response_text = f.read()
+
+    app = create_app(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                     error_rate=args.error_rate,
+                     error_codes=[int(code) for code in args.error_codes.split(",")],
+                     retry_after=args.retry_after, response_text=response_text, seed=args.seed)
+    print(f"🧪 Mock DeepSeek API on http://{args.host}:{args.port}/v1/chat/completions")
+    app.run(host=args.host, port=args.port, threaded=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import io
+import re
+import json
+from datetime import datetime
+from itertools import count
+from ESGAssets import SHARED_ASSET_CACHE, LOGO_PATH
+from ESGTemplate import Template, stylesheet, encode_parts, script_json
+
+# Machine-readable copy of esg_data embedded in every report, read back by read_report_data
+REPORT_DATA_VERSION = 1  # Bump when the payload layout changes
+REPORT_DATA_OPEN = '<script type="application/json" id="esg-report-data">'
+REPORT_DATA_CLOSE = "</script>"
+
+
+def embed_logo_base64(logo_path=LOGO_PATH):
+    """Logo as a data URI, encoded once per process (see ESGAssets.AssetCache)"""
+    return SHARED_ASSET_CACHE.data_uri(logo_path, "image/png")
+
+
+REPORT_HEAD = Template("""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{company_name} ESG Insights Report</title>
+        <style>{stylesheet}</style>
+        <script type="application/json" id="esg-report-data">{report_data}</script>
+    </head>
+    <body>
+    <div class="container">
+        <img src="{logo_data_uri}" alt="Company Logo" style="height:30px; max-width:175px; margin-bottom:20px;">
+            <header>
+                <h1>{company_name} ESG Insights Report</h1>
+                <h3 class="subtitle">Generated on: {current_date}</h3>
+                <div class="sentiment">
+                    <strong>LLM Score:</strong> {sentiment_score}/10<br>
+                    <strong>Rubric Score:</strong> {rubric_score}/10
+                </div>
+            </header>
+    """)
+
+SECTION_HEAD = Template("""
+            <h2>{heading}</h2>
+            <table>
+                <thead>
+                    <tr>
+                        <th width="5%">#</th>
+                        <th>{column}</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """)
+
+SECTION_ROW = Template("""
+                    <tr>
+                        <td>{idx}</td>
+                        <td>{item}</td>
+                    </tr>
+            """)
+
+SECTION_TAIL = """
+                </tbody>
+            </table>
+        """
+
+REPORT_FOOTER = Template("""
+            <footer>
+                ESG Insights Generated On {current_date}<br><br>
+                <strong>Contact:</strong> <a href="mailto:inquiry@aranca.com">inquiry@aranca.com</a> |
+                <a href="https://www.linkedin.com/in/your-profile" target="_blank">LinkedIn</a>
+            </footer>
+
+        </div>
+    </body>
+    </html>
+    """)
+
+# (esg_data key, heading, column title)
+REPORT_SECTIONS = (
+    ("environment", '<span class="category-icon">🌍</span>Environmental Insights', "Insight"),
+    ("social", '<span class="category-icon">🏢</span>Social Insights', "Insight"),
+    ("governance", '<span class="category-icon">🏛</span>Governance Insights', "Insight"),
+    ("management_remarks", "🎤 Key Remarks by Management", "Remark"),
+)
+
+
+def render_section(out, heading, column, items):
+    """Appends a numbered table of items to the list out (nothing when there are no items)"""
+    if not items:
+        return
+    SECTION_HEAD.render_into(out, heading=heading, column=column)
+    SECTION_ROW.render_rows(out, count(1), items)
+    out.append(SECTION_TAIL)
+
+
+def render_report_data(esg_data, company_name, current_date):
+    """
+    Serializes the versioned report payload for the data island
+    """
+    payload = {
+        "version": REPORT_DATA_VERSION,
+        "company_name": company_name,
+        "generated_on": current_date,
+        "esg_data": esg_data,
+    }
+    return script_json(payload)
+
+
+def read_report_data(html_text):
+    """
+    Reads the data island of a generated report with two string scans (no DOM)
+    :return: Payload dict, or None for reports without one (legacy files) or with a newer version
+    """
+    start = html_text.find(REPORT_DATA_OPEN)
+    if start == -1:
+        return None
+    start += len(REPORT_DATA_OPEN)
+    end = html_text.find(REPORT_DATA_CLOSE, start)
+    if end == -1:
+        return None
+    try:
+        payload = json.loads(html_text[start:end])
+    except ValueError:
+        print("⚠️ Ignoring malformed report data island")
+        return None
+    if not isinstance(payload, dict) or not 1 <= payload.get("version", 0) <= REPORT_DATA_VERSION:
+        return None
+    return payload
+
+
+def render_html_report(esg_data, company_name, logo_data_uri, current_date):
+    """
+    Renders the report from the precompiled templates
+    :return: List of HTML pieces, in document order
+    """
+    out = []
+    REPORT_HEAD.render_into(out, company_name=company_name, stylesheet=stylesheet(),
+                            report_data=render_report_data(esg_data, company_name, current_date),
+                            logo_data_uri=logo_data_uri, current_date=current_date,
+                            sentiment_score=esg_data.get('sentiment_score', 'N/A'),
+                            rubric_score=esg_data.get('rubric_score', 'N/A'))
+    for section, heading, column in REPORT_SECTIONS:
+        render_section(out, heading, column, esg_data[section])
+    REPORT_FOOTER.render_into(out, current_date=current_date)
+    return out
+
+
+def generate_html_report(esg_data, company_name):
+    """
+    Creates an interactive HTML report with company name only
+    Report name: ESG_Insights_<Company Name>.html
+    Report title: <Company Name> ESG Insights Report
+    """
+    # Clean company name for filename
+    safe_company_name = re.sub(r'[^\w\-_]', '_', company_name)[:50]
+    logo_data_uri = embed_logo_base64()
+
+    # Format current date
+    current_date = datetime.now().strftime("%B %d, %Y")
+    html_parts = render_html_report(esg_data, company_name, logo_data_uri, current_date)
+
+    # Create an in-memory file (BytesIO shares the encoded buffer rather than copying it)
+    file_stream = io.BytesIO(encode_parts(html_parts))
+
+    # Send file as an attachment
+    return file_stream, safe_company_name
@@ -0,0 +1,257 @@
+import os
+import re
+import tomllib
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# --- Rubric Settings ---
+RUBRIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rubric.toml")
+
+FEATURE_TYPES = ("keywords", "min_words", "count")
+FEATURE_SOURCES = {
+    "insights": ("environment", "social", "governance"),
+    "environment": ("environment",),
+    "social": ("social",),
+    "governance": ("governance",),
+    "management_remarks": ("management_remarks",),
+}
+BOUNDARY_MARKER = "\\b"
+DIGIT_WILDCARD = "#"
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def _is_boundary(text, pos):
+    """Same test as the regex \\b at text[pos]"""
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+
+def _expand_digits(keyword):
+    """Expands each DIGIT_WILDCARD into the ten digits ("#%" -> "0%" ... "9%")"""
+    if DIGIT_WILDCARD not in keyword:
+        return [keyword]
+    head, tail = keyword.split(DIGIT_WILDCARD, 1)
+    return [f"{head}{digit}{rest}" for digit in "0123456789" for rest in _expand_digits(tail)]
+
+
+class KeywordAutomaton:
+    """
+    Multi-keyword matcher in the style of Aho-Corasick: all keywords are merged into one
+    prefix trie, compiled to a single regex that reports the longest keyword starting at
+    each position. Shorter keywords starting at the same position are its prefixes, so
+    they are precomputed per keyword; one scan finds every occurrence, overlapping ones
+    included, and the trie keeps the cost per position flat as keywords are added.
+    """
+
+    def __init__(self, entries):
+        """
+        :param entries: Iterable of (keyword, tag, left_boundary, right_boundary); keywords
+                        must be lower-case, tags are reported when their keyword matches
+        """
+        specs = {}
+        for keyword, tag, left_boundary, right_boundary in entries:
+            if not keyword:
+                raise ValueError(f"Empty keyword for '{tag}'")
+            specs.setdefault(keyword, []).append((tag, len(keyword), left_boundary, right_boundary))
+
+        self.tags = {spec[0] for keyword_specs in specs.values() for spec in keyword_specs}
+        # Every keyword -> the specs of all keywords that are prefixes of it (itself included)
+        self._matches = {
+            keyword: [spec for end in range(1, len(keyword) + 1) for spec in specs.get(keyword[:end], ())]
+            for keyword in specs
+        }
+        self.pattern = re.compile(f"(?=({self._trie_pattern(specs)}))") if specs else None
+
+    @staticmethod
+    def _trie_pattern(keywords):
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    def find(self, text):
+        """Returns the set of tags with at least one keyword occurrence in text (lower-case)"""
+        found = set()
+        if self.pattern is None:
+            return found
+        for match in self.pattern.finditer(text):
+            start = match.start()
+            for tag, length, left_boundary, right_boundary in self._matches[match.group(1)]:
+                if tag in found:
+                    continue
+                if left_boundary and not _is_boundary(text, start):
+                    continue
+                if right_boundary and not _is_boundary(text, start + length):
+                    continue
+                found.add(tag)
+            if len(found) == len(self.tags):
+                break
+        return found
+
+
+class Rubric:
+    """
+    Rubric compiled from a config (see rubric.toml): per-feature weights, thresholds,
+    partial credit and matching rules. Keyword features sharing a source are matched by
+    one KeywordAutomaton, so every item is scanned once whatever the number of terms.
+    """
+
+    def __init__(self, config):
+        features = config.get("features") or {}
+        if not features:
+            raise ValueError("Rubric defines no features")
+
+        self.features = tuple(features)
+        self.weights = np.array([float(spec["weight"]) for spec in features.values()])
+        self.thresholds = np.array([float(spec["threshold"]) for spec in features.values()])
+        self.partial_credit = np.array([float(spec.get("partial_credit", 0.0)) for spec in features.values()])
+
+        # source -> (keyword automaton, [(feature, min_words)], [counted features])
+        keyword_entries = {}
+        self._sources = {}
+        for name, spec in features.items():
+            feature_type = spec.get("type", "keywords")
+            source = spec.get("source", "insights")
+            if feature_type not in FEATURE_TYPES:
+                raise ValueError(f"Unknown type '{feature_type}' for rubric feature '{name}'")
+            if source not in FEATURE_SOURCES:
+                raise ValueError(f"Unknown source '{source}' for rubric feature '{name}'")
+            _, min_words, counted = self._sources.setdefault(source, (None, [], []))
+
+            if feature_type == "keywords":
+                whole_word = spec.get("match", "substring") == "word"
+                entries = keyword_entries.setdefault(source, [])
+                for keyword in spec.get("keywords", []):
+                    left_boundary = right_boundary = whole_word
+                    if keyword.startswith(BOUNDARY_MARKER):
+                        left_boundary, keyword = True, keyword[len(BOUNDARY_MARKER):]
+                    if keyword.endswith(BOUNDARY_MARKER):
+                        right_boundary, keyword = True, keyword[:-len(BOUNDARY_MARKER)]
+                    entries.extend((literal, name, left_boundary, right_boundary)
+                                   for literal in _expand_digits(keyword.lower()))
+            elif feature_type == "min_words":
+                min_words.append((name, int(spec["min_words"])))
+            else:
+                counted.append(name)
+
+        for source, (_, min_words, counted) in self._sources.items():
+            self._sources[source] = (KeywordAutomaton(keyword_entries.get(source, [])), min_words, counted)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as f:
+            return cls(tomllib.load(f))
+
+    def count_features(self, esg_data):
+        """
+        Counts each feature for one analysis
+        :return: Dict of feature -> count, in config order
+        """
+        counts = dict.fromkeys(self.features, 0)
+        for source, (automaton, min_words, counted) in self._sources.items():
+            for section in FEATURE_SOURCES[source]:
+                items = esg_data[section]
+                for name in counted:
+                    counts[name] += len(items)
+                for item in items:
+                    if automaton.tags:
+                        for name in automaton.find(item.lower()):
+                            counts[name] += 1
+                    if min_words:
+                        word_count = len(item.split())
+                        for name, minimum in min_words:
+                            if word_count >= minimum:
+                                counts[name] += 1
+        return counts
+
+    def score(self, esg_data):
+        """Rubric score out of 10 for one analysis"""
+        score = 0
+        for count, weight, threshold, partial_credit in zip(self.count_features(esg_data).values(),
+                                                             self.weights, self.thresholds, self.partial_credit):
+            score += weight if count >= threshold else weight * partial_credit
+        return round(float(score), 2)
+
+    def feature_frame(self, analyses, index=None):
+        """DataFrame of feature counts for many analyses, one column per feature"""
+        return pd.DataFrame.from_records([self.count_features(esg_data) for esg_data in analyses],
+                                         index=index, columns=list(self.features))
+
+    def apply(self, features):
+        """
+        Weights feature counts into scores with NumPy column operations. Counts do not
+        depend on the weights, so after a weight or threshold change an archive is
+        re-scored by applying the new rubric to stored counts alone.
+        :param features: DataFrame from feature_frame
+        :return: Copy of features with a <feature>_points column per feature and rubric_score
+        """
+        counts = features[list(self.features)].to_numpy()
+        points = np.where(counts >= self.thresholds, self.weights, self.weights * self.partial_credit)
+        scored = features.copy()
+        for column, name in enumerate(self.features):
+            scored[f"{name}_points"] = points[:, column]
+        scored["rubric_score"] = np.round(points.sum(axis=1), 2)
+        return scored
+
+
+def load_rubric(path=RUBRIC_PATH):
+    """Loads and compiles the rubric config at path, reusing the compiled rubric until the file changes"""
+    stat = os.stat(path)
+    return _load_rubric(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _load_rubric(path, mtime_ns, size):
+    return Rubric.from_file(path)
+
+
+def rubric_features(esg_data, rubric=None):
+    """Counts the rubric features of one analysis (default rubric: rubric.toml)"""
+    return (rubric or load_rubric()).count_features(esg_data)
+
+
+def score_esg_by_rubric(esg_data, rubric=None):
+    """Evaluate ESG output based on rubric and return a score out of 10"""
+    return (rubric or load_rubric()).score(esg_data)
+
+
+def rubric_feature_frame(analyses, index=None, rubric=None):
+    """
+    Counts the rubric features of many analyses
+    :param analyses: Iterable of esg_data dicts
+    :param index: Optional index for the result (e.g. company names or document hashes)
+    :return: DataFrame with one count column per feature
+    """
+    return (rubric or load_rubric()).feature_frame(analyses, index=index)
+
+
+def apply_rubric(features, rubric=None):
+    """Adds per-feature points and rubric_score to a rubric_feature_frame result (see Rubric.apply)"""
+    return (rubric or load_rubric()).apply(features)
+
+
+def score_esg_batch(analyses, index=None, rubric=None):
+    """
+    Scores many analyses at once: features are counted with one scan per item, then
+    the weighting is applied as column operations over the whole batch
+    :return: DataFrame of feature counts, per-feature points and rubric_score (the same
+             value score_esg_by_rubric gives for each analysis)
+    """
+    rubric = rubric or load_rubric()
+    return rubric.apply(rubric.feature_frame(analyses, index=index))
@@ -0,0 +1,226 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+import pandas as pd
+from datetime import datetime
+from ESGCache import hash_file
+from ESGExtract import SPOOL_CHUNK_SIZE
+
+STORE_PATH = ".esg_cache/analyses.sqlite3"
+SCHEMA_VERSION = 1
+BUSY_TIMEOUT_MS = 5000  # How long a writer waits for another session's write to finish
+SECTIONS = ("environment", "social", "governance", "management_remarks")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    company TEXT NOT NULL,
+    company_key TEXT NOT NULL,      -- Case- and whitespace-insensitive company name for lookups
+    ticker TEXT,
+    document_hash TEXT,             -- SHA-256 of the analyzed PDF
+    mode TEXT,                      -- Analysis mode, e.g. Streaming or Per-pillar
+    created_at TEXT NOT NULL,       -- ISO 8601, local time
+    raw_response TEXT,              -- LLM response text, when the mode produces a single one
+    environment TEXT NOT NULL,      -- JSON arrays of insights
+    social TEXT NOT NULL,
+    governance TEXT NOT NULL,
+    management_remarks TEXT NOT NULL,
+    sentiment_score REAL,           -- LLM score, NULL when the response had none
+    rubric_score REAL
+);
+CREATE INDEX IF NOT EXISTS analyses_company ON analyses (company_key, created_at);
+CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS analyses_document ON analyses (document_hash);
+"""
+
+COLUMNS = ("id", "company", "ticker", "document_hash", "mode", "created_at", "raw_response",
+           *SECTIONS, "sentiment_score", "rubric_score")
+SELECT_COLUMNS = ", ".join(COLUMNS)
+
+# Latest ids come from the (company_key, created_at) index alone; only those rows are read
+LATEST_PER_COMPANY = """
+    SELECT {columns} FROM analyses WHERE id IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY company_key ORDER BY created_at DESC, id DESC) AS rank
+            FROM analyses
+        ) WHERE rank = 1
+    ) ORDER BY company_key
+"""
+
+
+def company_key(company_name):
+    return " ".join(company_name.split()).casefold()
+
+
+def hash_document(pdf_file):
+    """
+    SHA-256 hex digest of a PDF, the document hash analyses are stored under
+    :param pdf_file: Path or binary file-like object (e.g. a Streamlit UploadedFile)
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return hash_file(os.fspath(pdf_file))
+    digest = hashlib.sha256()
+    pdf_file.seek(0)
+    if hasattr(pdf_file, "getbuffer"):
+        with pdf_file.getbuffer() as buffer:
+            digest.update(buffer)
+    else:
+        for chunk in iter(lambda: pdf_file.read(SPOOL_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    pdf_file.seek(0)
+    return digest.hexdigest()
+
+
+def _score(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AnalysisStore:
+    """
+    Embedded SQLite store of completed analyses: company, ticker, document hash,
+    timestamp, raw response, insights per pillar, remarks, LLM and rubric scores.
+    Indexed by company, date and document hash, so comparisons and dashboards are
+    indexed queries instead of re-parsing report HTML. The database runs in WAL mode:
+    readers never block, and writers from concurrent sessions and processes queue
+    on a busy timeout. Each thread gets its own connection.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")  # Durable at checkpoints; safe with WAL
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _record(row):
+        record = dict(row)
+        for section in SECTIONS:
+            record[section] = json.loads(record[section])
+        return record
+
+    def _query(self, sql, params=()):
+        return [self._record(row) for row in self._connection().execute(sql, params)]
+
+    def put(self, esg_data, company_name, ticker=None, document_hash=None, raw_response=None, mode=None,
+            created_at=None):
+        """
+        Stores one analysis
+        :param esg_data: Parsed analysis (see ESGAnalysis.parse_esg_data), optionally with rubric_score
+        :param document_hash: SHA-256 of the analyzed PDF (see hash_document)
+        :param raw_response: LLM response text the analysis was parsed from, if any
+        :return: Row id of the stored analysis
+        """
+        created_at = created_at or datetime.now()
+        values = {
+            "company": company_name,
+            "company_key": company_key(company_name),
+            "ticker": ticker,
+            "document_hash": document_hash,
+            "mode": mode,
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "raw_response": raw_response,
+            **{section: json.dumps(esg_data.get(section, []), ensure_ascii=False) for section in SECTIONS},
+            "sentiment_score": _score(esg_data.get("sentiment_score")),
+            "rubric_score": _score(esg_data.get("rubric_score")),
+        }
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                f"INSERT INTO analyses ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                tuple(values.values())
+            )
+        return cursor.lastrowid
+
+    def by_document(self, document_hash):
+        """Analyses of one document, newest first"""
+        return self._query(f"SELECT {SELECT_COLUMNS} FROM analyses WHERE document_hash = ? "
+                           "ORDER BY created_at DESC, id DESC", (document_hash,))
+
+    def history(self, company_name, since=None, until=None):
+        """
+        Analyses of one company, newest first
+        :param since: Optional datetime; only analyses at or after it
+        :param until: Optional datetime; only analyses before it
+        """
+        sql = f"SELECT {SELECT_COLUMNS} FROM analyses WHERE company_key = ?"
+        params = [company_key(company_name)]
+        if since is not None:
+            sql += " AND created_at >= ?"
+            params.append(since.isoformat(timespec="seconds"))
+        if until is not None:
+            sql += " AND created_at < ?"
+            params.append(until.isoformat(timespec="seconds"))
+        return self._query(sql + " ORDER BY created_at DESC, id DESC", params)
+
+    def latest(self, company_names=None):
+        """
+        Latest analysis of each company
+        :param company_names: Optional list of companies (in the order results are returned);
+                              all companies, alphabetically, when omitted
+        """
+        if company_names is None:
+            return self._query(LATEST_PER_COMPANY.format(columns=SELECT_COLUMNS))
+        sql = (f"SELECT {SELECT_COLUMNS} FROM analyses WHERE company_key = ? "
+               "ORDER BY created_at DESC, id DESC LIMIT 1")
+        connection = self._connection()
+        records = []
+        for name in company_names:
+            row = connection.execute(sql, (company_key(name),)).fetchone()
+            if row is not None:
+                records.append(self._record(row))
+        return records
+
+    def comparison_reports(self, company_names=None):
+        """Latest analysis of each company in the format ESGComp.generate_comparison_html takes"""
+        return [{
+            "company_name": record["company"],
+            "sentiment_score": "N/A" if record["sentiment_score"] is None else f"{record['sentiment_score']:g}",
+            "environment": record["environment"],
+            "social": record["social"],
+            "governance": record["governance"],
+        } for record in self.latest(company_names)]
+
+    def companies(self):
+        """Stored company names (as last analyzed), alphabetically"""
+        return [row[0] for row in self._connection().execute(LATEST_PER_COMPANY.format(columns="company"))]
+
+    def score_frame(self):
+        """
+        Latest scores of every company, for dashboards (insights are not loaded)
+        :return: DataFrame with company, ticker, created_at, sentiment_score and rubric_score columns
+        """
+        return pd.read_sql_query(
+            LATEST_PER_COMPANY.format(columns="company, ticker, created_at, sentiment_score, rubric_score"),
+            self._connection()
+        )
+
+    def stats(self):
+        analyses, companies, documents = self._connection().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT company_key), COUNT(DISTINCT document_hash) FROM analyses"
+        ).fetchone()
+        return {
+            "analyses": analyses,
+            "companies": companies,
+            "documents": documents,
+            "bytes": os.path.getsize(self.path),
+        }
@@ -0,0 +1,71 @@
+import json
+import string
+from functools import lru_cache
+from ESGAssets import SHARED_ASSET_CACHE, REPORT_CSS_PATH
+
+
+class Template:
+    """
+    HTML template ({name} fields, str.format syntax) parsed once into a positional
+    format string, so rendering is a single str.format call. Rendering appends to a
+    list, so a document made of many templates (one per table row) is assembled with a
+    single join instead of repeated string concatenation.
+    """
+
+    def __init__(self, source):
+        fields = []
+        pieces = []
+        for literal, field, format_spec, conversion in string.Formatter().parse(source):
+            pieces.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Unsupported template field '{field}'")
+            if conversion not in (None, "r", "s", "a"):
+                raise ValueError(f"Unsupported conversion '!{conversion}' in template field '{field}'")
+            if "{" in (format_spec or ""):
+                raise ValueError(f"Nested fields are not supported in template field '{field}'")
+            if field not in fields:
+                fields.append(field)
+            pieces.append("{" + str(fields.index(field)) + (f"!{conversion}" if conversion else "")
+                          + (f":{format_spec}" if format_spec else "") + "}")
+        self.fields = tuple(fields)
+        self._format = "".join(pieces).format
+
+    def render(self, **values):
+        return self._format(*[values[field] for field in self.fields])
+
+    def render_into(self, out, **values):
+        """Appends the rendered template to the list out"""
+        out.append(self.render(**values))
+
+    def render_rows(self, out, *columns):
+        """
+        Appends one rendering per row to the list out, e.g. render_rows(out, count(1), items)
+        :param columns: One iterable per field, in the order the fields appear in the template
+        """
+        out.extend(map(self._format, *columns))
+
+
+def stylesheet(*extra_rules):
+    """The shared report stylesheet (report.css, via the asset cache) followed by extra_rules"""
+    return _compose_stylesheet(SHARED_ASSET_CACHE.read_text(REPORT_CSS_PATH), extra_rules)
+
+
+@lru_cache(maxsize=16)
+def _compose_stylesheet(rules, extra_rules):
+    return "\n" + rules + "".join(extra_rules)
+
+
+def encode_parts(parts, encoding="utf-8"):
+    """
+    Encodes rendered pieces into one document. Encoding piece by piece keeps the large
+    ASCII pieces (embedded logo, stylesheet) out of a str join, which would first widen
+    them to the widest character in the document (4 bytes each once an emoji appears).
+    """
+    return b"".join([part.encode(encoding) for part in parts])
+
+
+def script_json(value):
+    """Compact JSON for embedding in a <script> element; "<" is escaped so no string can close the element"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).replace("<", "\\u003c")
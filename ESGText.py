@@ -0,0 +1,303 @@
+import re
+import math
+import threading
+from itertools import islice
+from collections import Counter
+
+CHARS_PER_TOKEN = 4  # Rough average for English report text, until calibrated against API usage
+TOKEN_CALIBRATION_WEIGHT = 0.2  # Weight of each API usage observation in the running chars-per-token ratio
+
+# --- Normalization Settings ---
+REPEAT_FRACTION = 0.3  # Lines on at least this share of pages are treated as running headers/footers
+REPEAT_MIN_PAGES = 3
+MAX_BOILERPLATE_LINE = 200  # Longer lines are never treated as boilerplate
+EDGE_LINES = 3  # Lines at the top/bottom of a page checked for headers, footers and page numbers
+NORMALIZE_WINDOW = 32  # Pages normalized together when streaming (see iter_normalized_pages)
+EDGE_MASK_MAX_LINE = 60  # Longer edge lines only match exactly, never with their digits masked
+
+# --- Page Selection Settings ---
+SELECT_TOKENS = 30000  # Default document token budget for relevance-ranked page selection
+BM25_K1 = 1.5
+BM25_B = 0.75
+OUTLINE_BOOST = 1.0  # Bonus for pages inside ESG outline sections, in units of the mean page score
+
+# ESG vocabulary, covering the same domains the analysis prompt asks about
+ESG_TERMS = frozenset("""
+emissions emission ghg greenhouse scope carbon co2 co2e climate decarbonization net-zero netzero
+energy renewable renewables solar wind electricity efficiency kwh mwh gwh
+waste recycling recycled landfill circular packaging plastic
+water wastewater withdrawal consumption biodiversity deforestation nature land ecosystems
+environmental environment sustainability sustainable esg tcfd tnfd gri sasb cdp sbti issb iso
+diversity inclusion equity gender women ethnic pay gap workforce employees employee
+training learning development health safety injury injuries ltifr trir fatalities wellbeing
+community communities volunteering philanthropy human rights labor labour supplier suppliers
+board directors independent independence chair committee governance compensation remuneration
+ethics ethical conduct whistleblower whistleblowing speak-up audit auditor risk risks
+anti-corruption corruption bribery compliance cybersecurity privacy stakeholder stakeholders
+""".split())
+
+ESG_SECTION_PATTERN = re.compile(
+    r"sustainab|\besg\b|environment|climate|social|governance|responsib|people|community|"
+    r"diversity|emission|energy|ethic|tcfd|gri|sasb|impact",
+    re.IGNORECASE
+)
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9\-]*[a-z0-9]|[a-z]")
+DIGITS_PATTERN = re.compile(r"\d+")
+FIGURE_PATTERN = re.compile(r"\d[.,]\d")  # 1,037 or 12.5: a reported figure, not a page number
+SPACES_PATTERN = re.compile(r"[ \t\u00a0]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+HYPHEN_BREAK_PATTERN = re.compile(r"(\w)-\n(?=[a-z])")
+PAGE_NUMBER_PATTERN = re.compile(r"^(page\s*)?#(\s*(of|/)\s*#)?$")
+
+
+def estimate_tokens(text):
+    """Fast offline token estimate for prompt budgeting"""
+    return len(text) // CHARS_PER_TOKEN
+
+
+class TokenEstimator:
+    """
+    Offline token estimator calibrated against the token counts the API reports.
+    Keeps an exponentially weighted chars-per-token ratio, so estimates converge on
+    the model's tokenizer for the documents actually being analyzed.
+    """
+
+    def __init__(self, chars_per_token=CHARS_PER_TOKEN, weight=TOKEN_CALIBRATION_WEIGHT):
+        self.chars_per_token = chars_per_token
+        self.weight = weight
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, text):
+        """Estimated token count of text"""
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def max_chars(self, tokens):
+        """Number of characters estimated to fit in the given token budget"""
+        return max(0, int(tokens * self.chars_per_token))
+
+    def calibrate(self, text, actual_tokens):
+        """Updates the ratio with the API's actual token count for text"""
+        if not text or not actual_tokens:
+            return
+        ratio = len(text) / actual_tokens
+        with self._lock:
+            if self.observations:
+                self.chars_per_token += self.weight * (ratio - self.chars_per_token)
+            else:
+                self.chars_per_token = ratio  # The default is only a guess; trust the first measurement
+            self.observations += 1
+
+
+# Shared by every analysis in the process, so calibration carries across Streamlit sessions and batch workers
+SHARED_TOKEN_ESTIMATOR = TokenEstimator()
+
+
+def _line_key(line):
+    """Normalized form used to spot repeated lines: case-folded, whitespace collapsed"""
+    return " ".join(line.lower().split())
+
+
+def _maskable(key):
+    """Whether a line could be a page number or running title (short, no reported figures like 1,037)"""
+    return len(key) <= EDGE_MASK_MAX_LINE and not FIGURE_PATTERN.search(key)
+
+
+def _line_keys(lines):
+    """
+    Returns (exact keys, edge keys) for a page's lines. Edge keys are only computed for
+    short lines with digits among the first/last EDGE_LINES non-empty lines (where
+    headers, footers and page numbers live): (digit-masked key, numbers), so
+    "Page 12" and "Page 13" share a key.
+    """
+    exact = [_line_key(line) if len(line) <= MAX_BOILERPLATE_LINE else "" for line in lines]
+    edge = [None] * len(lines)
+    non_empty = [idx for idx, key in enumerate(exact) if key]
+    for idx in non_empty[:EDGE_LINES] + non_empty[-EDGE_LINES:]:
+        numbers = DIGITS_PATTERN.findall(exact[idx])
+        if numbers and _maskable(exact[idx]):
+            edge[idx] = (DIGITS_PATTERN.sub("#", exact[idx]), tuple(int(number) for number in numbers))
+    return exact, edge
+
+
+def _page_numbered(occurrences, threshold):
+    """
+    Whether lines sharing a digit-masked key carry a page number: one of their numbers
+    runs in step with the page index (at a constant offset, for unnumbered cover pages)
+    on at least threshold pages. Reported figures at the foot of a page do not, so they
+    are kept even when their masked forms repeat.
+    """
+    offsets = Counter()
+    for page_idx, numbers in occurrences:
+        offsets.update({(position, number - page_idx) for position, number in enumerate(numbers)})
+    return bool(offsets) and max(offsets.values()) >= threshold
+
+
+def normalize_pages(pages, repeat_fraction=REPEAT_FRACTION, min_pages=REPEAT_MIN_PAGES):
+    """
+    Strips running headers/footers, page numbers and repeated disclaimers, then
+    de-hyphenates line breaks and collapses whitespace.
+    Repeated lines are found with a frequency index over normalized lines: a line
+    occurring on at least repeat_fraction of the pages (and min_pages pages) is removed.
+    Lines that only repeat with their digits masked are removed only when the digits
+    are page numbers (see _page_numbered).
+    :param pages: List of (page_number, text)
+    :return: (normalized pages, stats dict with chars/tokens removed)
+    """
+    page_lines = []
+    line_frequency = Counter()
+    masked_occurrences = {}
+    for page_idx, (_, page_text) in enumerate(pages):
+        lines = page_text.split("\n")
+        exact, edge = _line_keys(lines)
+        page_lines.append((lines, exact, edge))
+        line_frequency.update({key for key in exact if key})
+        for masked_key, numbers in {entry for entry in edge if entry}:
+            masked_occurrences.setdefault(masked_key, []).append((page_idx, numbers))
+    threshold = max(min_pages, repeat_fraction * len(pages))
+    repeated = {key for key, count in line_frequency.items() if count >= threshold}
+    repeated_masked = {key for key, occurrences in masked_occurrences.items()
+                       if len(occurrences) >= threshold and _page_numbered(occurrences, threshold)}
+
+    normalized = []
+    chars_before = 0
+    chars_after = 0
+    for (page_num, page_text), (lines, exact, edge) in zip(pages, page_lines):
+        kept = []
+        for line, exact_key, edge_entry in zip(lines, exact, edge):
+            if exact_key in repeated:
+                continue
+            if edge_entry and (edge_entry[0] in repeated_masked or PAGE_NUMBER_PATTERN.match(edge_entry[0])):
+                continue
+            kept.append(SPACES_PATTERN.sub(" ", line).strip())
+        text = HYPHEN_BREAK_PATTERN.sub(r"\1", "\n".join(kept))
+        text = BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+        chars_before += len(page_text)
+        chars_after += len(text)
+        normalized.append((page_num, text))
+
+    stats = {
+        "repeated_lines": len(repeated) + len(repeated_masked),
+        "chars_before": chars_before,
+        "chars_after": chars_after,
+        "chars_removed": chars_before - chars_after,
+        "tokens_removed": (chars_before - chars_after) // CHARS_PER_TOKEN,
+    }
+    return normalized, stats
+
+
+def iter_normalized_pages(pages, window=NORMALIZE_WINDOW, stats=None):
+    """
+    Streaming normalize_pages: pages are normalized in consecutive windows of `window`
+    pages, each with its own repeat index, so extraction can still stop early once the
+    prompt is full. Running headers and footers repeat on nearly every page, so a window
+    spots them as reliably as the whole document. A short final window is merged into
+    the one before it so it is never too small to find repeats; at most two windows
+    are held at a time.
+    :param pages: Iterable of (page_number, text)
+    :param stats: Optional dict that accumulates the normalization statistics of the windows read
+    """
+    if stats is not None:
+        stats.update({"repeated_lines": 0, "chars_before": 0, "chars_after": 0,
+                      "chars_removed": 0, "tokens_removed": 0})
+    pages = iter(pages)
+    batch = list(islice(pages, window))
+    while batch:
+        following = list(islice(pages, window))
+        if len(following) < window:
+            batch += following
+            following = []
+        normalized, window_stats = normalize_pages(batch)
+        if stats is not None:
+            for key, value in window_stats.items():
+                stats[key] += value
+        yield from normalized
+        batch = following
+
+
+def outline_page_ranges(outline, page_count):
+    """
+    Converts a PyMuPDF table of contents ([level, title, page], 1-based pages)
+    into (title, first_page, last_page) ranges with 0-based page numbers
+    """
+    ranges = []
+    for idx, (level, title, page) in enumerate(outline):
+        if page < 1:
+            continue
+        end = page_count
+        for next_level, _, next_page in outline[idx + 1:]:
+            if next_level <= level and next_page >= page:
+                end = max(page, next_page - 1)
+                break
+        ranges.append((title, page - 1, end - 1))
+    return ranges
+
+
+def esg_outline_pages(outline, page_count):
+    """Returns the set of 0-based page numbers inside outline sections with ESG-related titles"""
+    pages = set()
+    for title, first, last in outline_page_ranges(outline, page_count):
+        if ESG_SECTION_PATTERN.search(title):
+            pages.update(range(first, last + 1))
+    return pages
+
+
+def score_pages_bm25(pages, terms=ESG_TERMS, k1=BM25_K1, b=BM25_B):
+    """
+    Scores each page against the ESG vocabulary with BM25
+    :param pages: List of (page_number, text)
+    :return: List of scores aligned with pages
+    """
+    term_counts = []
+    lengths = []
+    for _, page_text in pages:
+        words = WORD_PATTERN.findall(page_text.lower())
+        lengths.append(len(words))
+        term_counts.append(Counter(word for word in words if word in terms))
+
+    num_pages = len(pages)
+    avg_length = (sum(lengths) / num_pages) if num_pages else 0
+    document_frequency = Counter()
+    for counts in term_counts:
+        document_frequency.update(counts.keys())
+    idf = {term: math.log((num_pages - df + 0.5) / (df + 0.5) + 1) for term, df in document_frequency.items()}
+
+    scores = []
+    for counts, length in zip(term_counts, lengths):
+        norm = k1 * (1 - b + b * length / avg_length) if avg_length else k1
+        scores.append(sum(idf[term] * tf * (k1 + 1) / (tf + norm) for term, tf in counts.items()))
+    return scores
+
+
+def select_relevant_pages(pages, token_budget=SELECT_TOKENS, outline=None, page_count=None):
+    """
+    Relevance-ranked page selection: scores every page with BM25 over the ESG vocabulary,
+    boosts pages inside ESG sections of the PDF outline, and packs the highest-scoring
+    pages into token_budget. Budget left over is filled with the pages that do not score,
+    in page order, so a report in another language or wording still gets its leading
+    pages rather than nothing. Selected pages are returned in their original order.
+    :param pages: List of (page_number, text)
+    :param outline: Optional PyMuPDF table of contents (doc.get_toc())
+    """
+    pages = [(page_num, page_text) for page_num, page_text in pages if page_text.strip()]
+    page_tokens = [estimate_tokens(page_text) for _, page_text in pages]
+    if sum(page_tokens) <= token_budget:
+        return pages
+
+    scores = score_pages_bm25(pages)
+    if outline:
+        section_pages = esg_outline_pages(outline, page_count or (pages[-1][0] + 1))
+        nonzero = [score for score in scores if score > 0]
+        bonus = OUTLINE_BOOST * (sum(nonzero) / len(nonzero) if nonzero else 1.0)
+        scores = [score + bonus if page_num in section_pages else score
+                  for (page_num, _), score in zip(pages, scores)]
+
+    # Unscored pages rank last, in page order
+    ranked = sorted(range(len(pages)), key=lambda idx: (-scores[idx], idx))
+    selected = []
+    used = 0
+    for idx in ranked:
+        if used + page_tokens[idx] <= token_budget:
+            selected.append(idx)
+            used += page_tokens[idx]
+    return [pages[idx] for idx in sorted(selected)]
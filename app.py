@@ -2,32 +2,50 @@
 import streamlit as st
 st.set_page_config(page_title="Aranca ESG Analyzer", layout="wide", page_icon="📊")
 
-import fitz  # PyMuPDF for PDF extraction
-import requests
-import re
-import io
 import json
 import os
-import base64
 import hashlib
+import time
 import pandas as pd
 from datetime import datetime
 from streamlit_echarts import st_echarts
-import streamlit.components.v1 as components
-from bs4 import BeautifulSoup
-from ESGComp import extract_data_from_html, generate_comparison_html
+from ESGComp import iter_report_data, generate_comparison_html, COMPARISON_FILE
+from ESGExtract import extract_text_from_pdf, DEFAULT_WORKERS
+from ESGCache import PdfTextCache, ResponseCache
+from ESGClient import DeepSeekClient, DeepSeekAPIError, Cassette, DEEPSEEK_API_URL
+from ESGAnalysis import (analyze_esg_with_deepseek, analyze_esg_chunked, stream_esg_with_deepseek,
+                         analyze_esg_json, iter_pillar_analyses, merge_pillar, parse_esg_data,
+                         ESGStreamParser, PROMPT_MAX_CHARS)
+from ESGRubric import Rubric, score_esg_by_rubric, RUBRIC_PATH
+from ESGReport import generate_html_report
+from ESGText import SELECT_TOKENS, SHARED_TOKEN_ESTIMATOR
+from ESGAssets import SHARED_ASSET_CACHE, LOGO_PATH, APP_CSS_PATH
+from ESGStore import AnalysisStore, hash_document
 
 # --- API Keys ---
 DEEPSEEK_API_KEY = st.secrets["deepseek"]["api_key"]
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEEPSEEK_API_URL = st.secrets["deepseek"].get("api_url", DEEPSEEK_API_URL)  # Override to use a local mock server
 
+# --- PDF Extraction Settings ---
+PDF_WORKERS = DEFAULT_WORKERS  # Worker processes used for page extraction
+PDF_MAX_PAGES = None  # None = extract every page
+NORMALIZE_TEXT = True  # Strip repeated headers/footers and boilerplate before prompting
+PDF_CACHE_DIR = ".esg_cache/pdf_text"
+PDF_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
-# --- Logo and Base64 encoding ---
-def get_base64_logo(path="logo.png"):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+# --- DeepSeek Response Cache Settings ---
+RESPONSE_CACHE_DIR = ".esg_cache/llm_responses"
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RESPONSE_CACHE_TTL = 7 * 24 * 3600  # Seconds
 
-logo_base64 = get_base64_logo()
+# --- Analysis Store Settings ---
+ANALYSIS_STORE_PATH = ".esg_cache/analyses.sqlite3"  # SQLite (WAL) database of completed analyses
+
+# --- Rubric Settings ---
+RUBRIC_CONFIG = RUBRIC_PATH  # Weights, thresholds and keyword sets for the rubric score
+
+# --- Static Assets (read and encoded once per process, reloaded when the file changes) ---
+logo_base64 = SHARED_ASSET_CACHE.base64(LOGO_PATH)
 
 
 # --- Whitelisted Emails ---
@@ -105,223 +123,50 @@ if st.button("🔓 Logout"):
     st.session_state.clear()
     st.rerun()
 
-def embed_logo_base64(logo_path="logo.png"):
-    with open(logo_path, "rb") as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode()
-        return f"data:image/png;base64,{encoded_string}"
+@st.cache_resource
+def get_pdf_text_cache():
+    """Process-wide extracted-text cache, shared by all sessions"""
+    return PdfTextCache(PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES)
 
-def extract_text_from_pdf(pdf_file):
-    """Enhanced PDF text extraction with better error handling"""
-    try:
-        # Open the PDF file from memory
-        doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
-        pdf_file.seek(0)  # Reset file pointer after reading
-
-        text = []
-        max_pages = 50  # Limit for very large documents
-
-        for page_num, page in enumerate(doc):
-            if page_num >= max_pages:
-                break
-            try:
-                page_text = page.get_text("text")
-                if page_text.strip():
-                    text.append(page_text)
-            except Exception as e:
-                print(f"⚠️ Error reading page {page_num + 1}: {e}")
-
-        full_text = "\n\n".join(text)
-        if not full_text.strip():
-            print("❌ Warning: No text found in PDF. Is this a scanned document?")
-        return full_text
-    except Exception as e:
-        print(f"❌ Error reading PDF file: {e}")
-        return ""
-
-def analyze_esg_with_deepseek(text):
-    """Improved DeepSeek analysis with better prompting and error handling"""
-    if not text.strip():
-        print("❌ Error: Cannot send empty text to DeepSeek API!")
-        return "DeepSeek API Error: No text provided."
-
-    prompt = f"""
-    You are an expert ESG analyst. Carefully read the following ESG disclosure and generate a detailed analysis. Be specific and data-driven.
-
-    Provide the analysis in these sections:
-
-    1. 🌍 **Environmental (E)**:
-       - Give **10 detailed insights** about energy use, emissions, renewable energy adoption, waste reduction, water conservation, climate initiatives, biodiversity actions, etc.
-       - Use **quantitative data**, clear targets, and named programs or initiatives.
-       - Mention **year-over-year improvements** or regressions if applicable.
-       - Avoid vague statements; elaborate where necessary.
-
-    2. 🏢 **Social (S)**:
-       - Give **10 detailed insights** covering labor practices, diversity & inclusion, community engagement, training programs, health & safety, etc.
-       - Include **figures**, **employee stats**, and **notable case studies** if present.
-       - Highlight notable changes over time and any certifications or recognitions.
-
-    3. 🏛 **Governance (G)**:
-       - Provide **10 robust insights** on board structure, executive compensation, risk management, ethics programs, whistleblower mechanisms, and audit independence.
-       - Use **board diversity numbers**, policy names, or governance frameworks where mentioned.
-
-    4. 🎤 **Key Management Remarks**:
-       - Extract **5–10 strong quotes** from executive leadership, especially forward-looking or strategic statements.
-       - Attribute each quote to a named executive or title if mentioned.
-
-    5. 🎯 **ESG Sentiment Score**:
-       - Rate from 1–10 (10 = exceptional ESG commitment and execution).
-       - Justify score briefly in 1–2 lines by considering specificity, tone, and depth of ESG strategy.
-
-    Return only the output in this structured format:
-        ```
-        Environmental:
-        1. Insight 1...
-        2. Insight 2...
-        ...
-        10. Insight 10...
-
-        Social:
-        1. Insight 1...
-        ...
-        10. Insight 10...
-
-        Governance:
-        1. Insight 1...
-        ...
-        10. Insight 1...
-
-        Key Remarks:
-        1. "Quote 1..." - [Title]
-        2. "Quote 2..." - [Title]
-        ...
-
-        ESG Sentiment Score: X/10
-        ```
-
-    DOCUMENT TEXT:
-    {text[:500000]}
-    """
+@st.cache_resource
+def get_deepseek_client():
+    """Process-wide pooled DeepSeek client; its rate limiter is shared by all sessions"""
+    return DeepSeekClient(DEEPSEEK_API_KEY, api_url=DEEPSEEK_API_URL, cassette=Cassette.from_env())
 
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
+@st.cache_resource
+def get_response_cache():
+    """Process-wide DeepSeek response cache, shared by all sessions"""
+    return ResponseCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL)
 
-    payload = {
-        "model": "deepseek-chat",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.5,
-        "max_tokens": 8000
-    }
+@st.cache_resource
+def get_analysis_store():
+    """Process-wide analysis store; each session thread gets its own SQLite connection"""
+    return AnalysisStore(ANALYSIS_STORE_PATH)
 
+def store_analysis(esg_data, company_name, pdf_file, raw_response=None, mode=None):
+    """Records a completed analysis; a store failure never fails the report"""
     try:
-        response = requests.post(DEEPSEEK_API_URL, headers=headers, json=payload, timeout=60)
-        if response.status_code != 200:
-            print(f"❌ API Error: {response.status_code}, Response: {response.text}")
-            return f"DeepSeek API Error: {response.status_code}"
-
-        response_data = response.json()
-        if "choices" in response_data:
-            result = response_data["choices"][0]["message"]["content"]
-            return result
-        else:
-            print("❌ Unexpected API response format")
-            return "DeepSeek API Error: No insights generated."
+        get_analysis_store().put(esg_data, company_name, document_hash=hash_document(pdf_file),
+                                 raw_response=raw_response, mode=mode)
     except Exception as e:
-        print(f"❌ DeepSeek API Request Failed: {e}")
-        return f"DeepSeek API Error: {str(e)}"
-
-def parse_esg_data(api_response):
-    """Enhanced parsing with better error handling"""
-    esg_data = {
-        "environment": [],
-        "social": [],
-        "governance": [],
-        "management_remarks": [],
-        "sentiment_score": "N/A"
-    }
-
-    try:
-        # Extract Environmental insights
-        env_match = re.search(r'Environmental:\s*(.*?)(?=\n\s*Social:|$)', api_response, re.DOTALL)
-        if env_match:
-            env_insights = [i.strip() for i in env_match.group(1).split('\n') if i.strip()]
-            esg_data["environment"] = [re.sub(r'^\d+\.\s*', '', i) for i in env_insights[:10]]
-
-        # Extract Social insights
-        soc_match = re.search(r'Social:\s*(.*?)(?=\n\s*Governance:|$)', api_response, re.DOTALL)
-        if soc_match:
-            soc_insights = [i.strip() for i in soc_match.group(1).split('\n') if i.strip()]
-            esg_data["social"] = [re.sub(r'^\d+\.\s*', '', i) for i in soc_insights[:10]]
-
-        # Extract Governance insights
-        gov_match = re.search(r'Governance:\s*(.*?)(?=\n\s*Key Remarks:|$)', api_response, re.DOTALL)
-        if gov_match:
-            gov_insights = [i.strip() for i in gov_match.group(1).split('\n') if i.strip()]
-            esg_data["governance"] = [re.sub(r'^\d+\.\s*', '', i) for i in gov_insights[:10]]
-
-        # Extract Management Remarks
-        mgmt_match = re.search(r'Key Remarks:\s*(.*?)(?=\n\s*ESG Sentiment Score:|$)', api_response, re.DOTALL)
-        if mgmt_match:
-            remarks = [i.strip() for i in mgmt_match.group(1).split('\n') if i.strip()]
-            esg_data["management_remarks"] = [re.sub(r'^\d+\.\s*', '', i) for i in remarks[:10]]
-
-        # Extract Sentiment Score
-        sentiment_match = re.search(r'ESG Sentiment Score:\s*(\d+\.?\d*)\s*/\s*10', api_response)
-        if sentiment_match:
-            esg_data["sentiment_score"] = sentiment_match.group(1)
-
-    except Exception as e:
-        print(f"⚠️ Error parsing ESG data: {e}")
-
-    return esg_data
-
-def score_esg_by_rubric(esg_data):
-    """Evaluate ESG output based on rubric and return a score out of 10"""
-    score = 0
-    total_weight = 0
-
-    def count_quantitative(insights):
-        return sum(1 for i in insights if re.search(r"\d+[%$]|tons|kWh|CO2|GHG|employees|ISO|CDP|GRI", i, re.IGNORECASE))
-
-    def count_specific(insights):
-        return sum(1 for i in insights if len(i.split()) > 8)
-
-    def count_named_programs(insights):
-        return sum(1 for i in insights if re.search(r"\b(program|initiative|strategy|framework|plan|policy)\b", i, re.IGNORECASE))
-
-    weights = {
-        "quantitative": 2.5,
-        "specificity": 2.5,
-        "programs": 2.0,
-        "quotes": 2.0,
-        "certifications": 1.0
-    }
-
-    # Environmental + Social + Governance combined
-    all_insights = esg_data["environment"] + esg_data["social"] + esg_data["governance"]
-
-    # Quantitative insights
-    quant_count = count_quantitative(all_insights)
-    score += weights["quantitative"] if quant_count >= 5 else weights["quantitative"] * 0.4
-
-    # Specificity
-    specific_count = count_specific(all_insights)
-    score += weights["specificity"] if specific_count >= 10 else weights["specificity"] * 0.5
-
-    # Named programs/initiatives
-    named_count = count_named_programs(all_insights)
-    score += weights["programs"] if named_count >= 5 else weights["programs"] * 0.5
-
-    # Management quotes
-    quote_count = len(esg_data["management_remarks"])
-    score += weights["quotes"] if quote_count >= 5 else weights["quotes"] * 0.5
-
-    # Certifications
-    cert_count = sum(1 for i in all_insights if re.search(r"\bISO|CDP|GRI\b", i, re.IGNORECASE))
-    score += weights["certifications"] if cert_count >= 1 else weights["certifications"] * 0.2
-
-    return round(score, 2)
+        print(f"⚠️ Could not store analysis: {e}")
+
+@st.cache_resource
+def _compile_rubric(path, mtime_ns):
+    return Rubric.from_file(path)
+
+def get_rubric():
+    """Rubric compiled once per version of the config file, shared by all sessions and reruns"""
+    return _compile_rubric(RUBRIC_CONFIG, os.stat(RUBRIC_CONFIG).st_mtime_ns)
+
+# ----------- Insight Rendering ----------- #
+def render_insight(container, section, item):
+    """Appends one insight (or management remark) to its expander"""
+    with container:
+        if section == "management_remarks":
+            st.markdown(f"<div style='margin-bottom: 1rem; padding-left: 1rem; border-left: 3px solid #2196F3; font-style: italic;'>\"{item}\"</div>", unsafe_allow_html=True)
+        else:
+            st.markdown(f"<div style='margin-bottom: 0.5rem;'>• {item}</div>", unsafe_allow_html=True)
 
 # ----------- Gauge Chart ----------- #
 def show_esg_gauge(score):
@@ -356,217 +201,21 @@ def show_esg_gauge(score):
     st_echarts(option, height="360px")
 
 
-def generate_html_report(esg_data, company_name):
-    """
-    Creates an interactive HTML report with company name only
-    Report name: ESG_Insights_<Company Name>.html
-    Report title: <Company Name> ESG Insights Report
-    """
-    # Clean company name for filename
-    safe_company_name = re.sub(r'[^\w\-_]', '_', company_name)[:50]
-    logo_data_uri = embed_logo_base64("logo.png")
-    output_file = f"ESG_Insights_{safe_company_name}.html"
-
-    # Format current date
-    current_date = datetime.now().strftime("%B %d, %Y")
-
-    def generate_section(title, icon, insights):
-        if not insights:
-            return ""
-        section_html = f"""
-            <h2><span class="category-icon">{icon}</span>{title}</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th width="5%">#</th>
-                        <th>Insight</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        for idx, insight in enumerate(insights, 1):
-            section_html += f"""
-                    <tr>
-                        <td>{idx}</td>
-                        <td>{insight}</td>
-                    </tr>
-            """
-        section_html += """
-                </tbody>
-            </table>
-        """
-        return section_html
-
-    # Build the complete HTML content
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{company_name} ESG Insights Report</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                background-color: #f9f9f9;
-                padding: 0;
-                margin: 0;
-            }}
-            .container {{
-                max-width: 1000px;
-                margin: 20px auto;
-                background: white;
-                padding: 30px;
-                border-radius: 8px;
-                box-shadow: 0 0 20px rgba(0,0,0,0.1);
-            }}
-            header {{
-                border-bottom: 2px solid #2196F3;
-                padding-bottom: 20px;
-                margin-bottom: 30px;
-            }}
-            h1, h2, h3 {{
-                color: #2c3e50;
-            }}
-            h1 {{
-                margin-top: 0;
-                font-size: 2.2em;
-            }}
-            h2 {{
-                border-bottom: 1px solid #eee;
-                padding-bottom: 8px;
-                margin-top: 30px;
-                font-size: 1.5em;
-                color: #2196F3;
-            }}
-            h3.subtitle {{
-                color: #7f8c8d;
-                font-weight: normal;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 20px 0;
-                font-size: 0.95em;
-            }}
-            th, td {{
-                border: 1px solid #ddd;
-                padding: 12px 15px;
-                text-align: left;
-            }}
-            th {{
-                background-color: #2196F3;
-                color: white;
-                font-weight: bold;
-            }}
-            tr:nth-child(even) {{
-                background-color: #f2f2f2;
-            }}
-            tr:hover {{
-                background-color: #e3f2fd;
-            }}
-            .sentiment {{
-                font-size: 1.2em;
-                padding: 10px 15px;
-                background-color: #e8f5e9;
-                border-radius: 4px;
-                display: inline-block;
-                margin: 10px 0;
-            }}
-            footer {{
-                margin-top: 40px;
-                text-align: center;
-                font-size: 0.9em;
-                color: #7f8c8d;
-                border-top: 1px solid #eee;
-                padding-top: 20px;
-            }}
-            .category-icon {{
-                font-size: 1.2em;
-                margin-right: 8px;
-            }}
-        </style>
-    </head>
-    <body>
-    <div class="container">
-        <img src="{logo_data_uri}" alt="Company Logo" style="height:30px; max-width:175px; margin-bottom:20px;">
-            <header>
-                <h1>{company_name} ESG Insights Report</h1>
-                <h3 class="subtitle">Generated on: {current_date}</h3>
-                <div class="sentiment">
-                    <strong>LLM Score:</strong> {esg_data.get('sentiment_score', 'N/A')}/10<br>
-                    <strong>Rubric Score:</strong> {esg_data.get('rubric_score', 'N/A')}/10
-                </div>
-            </header>
-    """
-
-    # Add sections
-    html_content += generate_section("Environmental Insights", "🌍", esg_data["environment"])
-    html_content += generate_section("Social Insights", "🏢", esg_data["social"])
-    html_content += generate_section("Governance Insights", "🏛", esg_data["governance"])
-
-    # Add management remarks if available
-    if esg_data["management_remarks"]:
-        html_content += """
-            <h2>🎤 Key Remarks by Management</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th width="5%">#</th>
-                        <th>Remark</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        for idx, remark in enumerate(esg_data["management_remarks"], 1):
-            html_content += f"""
-                    <tr>
-                        <td>{idx}</td>
-                        <td>{remark}</td>
-                    </tr>
-            """
-        html_content += """
-                </tbody>
-            </table>
-        """
-
-    # Footer
-    html_content += f"""
-            <footer>
-                ESG Insights Generated On {current_date}<br><br>
-                <strong>Contact:</strong> <a href="mailto:inquiry@aranca.com">inquiry@aranca.com</a> |
-                <a href="https://www.linkedin.com/in/your-profile" target="_blank">LinkedIn</a>
-            </footer>
-
-        </div>
-    </body>
-    </html>
-    """
-
-    # Create an in-memory file
-    file_stream = io.BytesIO()
-    file_stream.write(html_content.encode('utf-8'))
-    file_stream.seek(0)
-
-    # Send file as an attachment
-    return file_stream, safe_company_name
-
-
 def updated_generate_esg_report(pdf_file, company_name):
     """
     Main function to generate ESG report with enhanced error handling
     """
     try:
         # Step 1: Extract text from PDF
-        pdf_text = extract_text_from_pdf(pdf_file)
+        pdf_text = extract_text_from_pdf(pdf_file, max_workers=PDF_WORKERS, max_pages=PDF_MAX_PAGES,
+                                         max_chars=PROMPT_MAX_CHARS, text_cache=get_pdf_text_cache(),
+                                         normalize=NORMALIZE_TEXT)
         if not pdf_text.strip():
             print("❌ Error: No text extracted from PDF")
             return False
 
         # Step 2: Analyze with DeepSeek
-        esg_analysis = analyze_esg_with_deepseek(pdf_text)
+        esg_analysis = analyze_esg_with_deepseek(pdf_text, get_deepseek_client(), response_cache=get_response_cache())
         if "Error" in esg_analysis:
             print(f"❌ Analysis failed: {esg_analysis}")
             return False
@@ -575,10 +224,10 @@ def updated_generate_esg_report(pdf_file, company_name):
         esg_data = parse_esg_data(esg_analysis)
 
         # Step 4: Apply rubric-based scoring
-        rubric_score = score_esg_by_rubric(esg_data)
+        rubric_score = score_esg_by_rubric(esg_data, get_rubric())
         esg_data["rubric_score"] = f"{rubric_score}"  # your score
         # DeepSeek score already exists in esg_data["sentiment_score"]
-
+        store_analysis(esg_data, company_name, pdf_file, raw_response=esg_analysis, mode="Single request")
 
         # Step 5: Generate report
         report_file, safe_company_name = generate_html_report(esg_data, company_name)
@@ -595,124 +244,10 @@ def updated_generate_esg_report(pdf_file, company_name):
 
 # --- Page Setup ---
 
-# Logo loader
-def get_base64_logo(path):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-logo_base64 = get_base64_logo("logo.png")
-
 # Inject CSS style with improved layout
 st.markdown(f"""
 <style>
-    /* Main container styling */
-    .main {{
-        background-color: #ffffff;
-        color: #010101;
-    }}
-    
-    /* Header with logo and title */
-    .header-container {{
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        padding: 1rem 2rem;
-        background-color: white;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        margin-bottom: 2rem;
-    }}
-    
-    .title-container {{
-        display: flex;
-        flex-direction: column;
-        align-items: flex-start;
-    }}
-    
-    .logo-container {{
-        display: flex;
-        align-items: center;
-    }}
-    
-    /* Button styling */
-    .stButton > button {{
-        background-color: #2196F3;
-        color: white;
-        border-radius: 8px;
-        font-weight: bold;
-        padding: 0.5rem 1rem;
-        transition: all 0.3s ease;
-        border: none;
-    }}
-    
-    .stButton > button:hover {{
-        background-color: #1976D2 !important;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(33, 150, 243, 0.3);
-    }}
-    
-    /* Expander styling */
-    .streamlit-expanderHeader {{
-        font-size: 1.1rem !important;
-        font-weight: 600 !important;
-        color: #2196F3 !important;
-        padding: 0.75rem 1rem;
-    }}
-    
-    .streamlit-expanderHeader:hover {{
-        background-color: #f5f5f5 !important;
-    }}
-    
-    /* Input fields */
-    .stTextInput input, .stFileUploader label {{
-        font-size: 1rem !important;
-        color: #222 !important;
-    }}
-    
-    /* Score box */
-    .score-box {{
-        background-color: #f8f9fa;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 1rem 0;
-        border-left: 4px solid #2196F3;
-    }}
-    
-    /* Custom footer */
-    .custom-footer {{
-        text-align: center;
-        padding: 1rem;
-        color: #666;
-        font-size: 0.9rem;
-        margin-top: 2rem;
-    }}
-    
-    /* Download button */
-    .stDownloadButton > button {{
-        background-color: #4CAF50 !important;
-        color: white !important;
-    }}
-    
-    .stDownloadButton > button:hover {{
-        background-color: #388E3C !important;
-    }}
-    
-    /* Section dividers */
-    .section-divider {{
-        border-top: 1px solid #eee;
-        margin: 2rem 0;
-    }}
-    
-    /* Responsive adjustments */
-    @media (max-width: 768px) {{
-        .header-container {{
-            flex-direction: column;
-            align-items: flex-start;
-        }}
-        .logo-container {{
-            margin-bottom: 1rem;
-        }}
-    }}
-</style>
+{SHARED_ASSET_CACHE.read_text(APP_CSS_PATH)}</style>
 
 <!-- Header with logo at top right -->
 <div class="header-container">
@@ -733,20 +268,113 @@ with st.container():
         company = st.text_input("🏢 Enter Company Name", placeholder="Type here...")
     with col2:
         file = st.file_uploader("📄 Upload ESG Disclosure PDF", type="pdf")
+    analysis_mode = st.radio(
+        "🧠 Analysis mode",
+        ["Streaming", "Chunked", "Per-pillar", "Structured JSON"],
+        horizontal=True,
+        help="Streaming: one request, insights appear as they are generated. "
+             "Chunked: covers the full report, runs parts in parallel. "
+             "Per-pillar: E, S, G and remarks run in parallel. "
+             "Structured JSON: validated JSON output, missing sections are repaired with a targeted request."
+    )
+    option_col1, option_col2 = st.columns(2)
+    with option_col1:
+        focus_pages = st.checkbox("🎯 Focus on ESG-relevant pages", value=True)
+    with option_col2:
+        refresh_analysis = st.checkbox("♻️ Refresh analysis (bypass cached response)", value=False)
 
     if st.button("🚀 Generate ESG Report", type="primary"):
         if not all([company, file]):
             st.error("Please enter a company name and upload a PDF file.")
         else:
             with st.spinner("Analyzing ESG disclosures..."):
-                text = extract_text_from_pdf(file)
-                response = analyze_esg_with_deepseek(text)
-                esg_data = parse_esg_data(response)
+                # Placeholders keep the scores above the insights, which fill in as they stream
+                score_placeholder = st.empty()
+                gauge_placeholder = st.empty()
+                insight_boxes = {
+                    "environment": st.expander("🌍 Environmental Insights", expanded=True),
+                    "social": st.expander("🏢 Social Insights"),
+                    "governance": st.expander("🏛 Governance Insights"),
+                    "management_remarks": st.expander("🎤 Management Remarks"),
+                }
 
-                esg_data["rubric_score"] = score_esg_by_rubric(esg_data)
+                normalization_stats = {}
+                raw_response = None  # Only the streaming mode produces a single response text
+                if analysis_mode == "Chunked":
+                    text = extract_text_from_pdf(file, max_workers=PDF_WORKERS, max_pages=PDF_MAX_PAGES,
+                                                 text_cache=get_pdf_text_cache(),
+                                                 normalize=NORMALIZE_TEXT, stats=normalization_stats)
+                    esg_data = analyze_esg_chunked(text, get_deepseek_client(), response_cache=get_response_cache(),
+                                                   refresh=refresh_analysis)
+                    if esg_data is None:
+                        st.error("❌ Chunked analysis failed for every part of the report.")
+                        st.stop()
+                    for section, box in insight_boxes.items():
+                        for item in esg_data[section]:
+                            render_insight(box, section, item)
+                elif analysis_mode == "Structured JSON":
+                    text = extract_text_from_pdf(file, max_workers=PDF_WORKERS, max_pages=PDF_MAX_PAGES,
+                                                 max_chars=PROMPT_MAX_CHARS, text_cache=get_pdf_text_cache(),
+                                                 select_tokens=SELECT_TOKENS if focus_pages else None,
+                                                 normalize=NORMALIZE_TEXT, stats=normalization_stats)
+                    esg_data = analyze_esg_json(text, get_deepseek_client(), response_cache=get_response_cache(),
+                                                refresh=refresh_analysis)
+                    if esg_data is None:
+                        st.error("❌ Structured JSON analysis failed.")
+                        st.stop()
+                    for section, box in insight_boxes.items():
+                        for item in esg_data[section]:
+                            render_insight(box, section, item)
+                elif analysis_mode == "Per-pillar":
+                    text = extract_text_from_pdf(file, max_workers=PDF_WORKERS, max_pages=PDF_MAX_PAGES,
+                                                 max_chars=PROMPT_MAX_CHARS, text_cache=get_pdf_text_cache(),
+                                                 select_tokens=SELECT_TOKENS if focus_pages else None,
+                                                 normalize=NORMALIZE_TEXT, stats=normalization_stats)
+                    esg_data = {
+                        "environment": [],
+                        "social": [],
+                        "governance": [],
+                        "management_remarks": [],
+                        "sentiment_score": "N/A"
+                    }
+                    completed_pillars = 0
+                    # Each pillar is rendered as soon as its request completes
+                    for pillar, pillar_data in iter_pillar_analyses(text, get_deepseek_client(),
+                                                                    response_cache=get_response_cache(),
+                                                                    refresh=refresh_analysis):
+                        merge_pillar(esg_data, pillar, pillar_data)
+                        completed_pillars += 1
+                        for item in esg_data[pillar]:
+                            render_insight(insight_boxes[pillar], pillar, item)
+                    if not completed_pillars:
+                        st.error("❌ Per-pillar analysis failed for every pillar.")
+                        st.stop()
+                else:
+                    text = extract_text_from_pdf(file, max_workers=PDF_WORKERS, max_pages=PDF_MAX_PAGES,
+                                                 max_chars=PROMPT_MAX_CHARS, text_cache=get_pdf_text_cache(),
+                                                 select_tokens=SELECT_TOKENS if focus_pages else None,
+                                                 normalize=NORMALIZE_TEXT, stats=normalization_stats)
+                    parser = ESGStreamParser()
+                    response_parts = []
+                    try:
+                        for delta in stream_esg_with_deepseek(text, get_deepseek_client(), response_cache=get_response_cache(),
+                                                              refresh=refresh_analysis):
+                            response_parts.append(delta)
+                            for section, item in parser.feed(delta):
+                                render_insight(insight_boxes[section], section, item)
+                        for section, item in parser.close():
+                            render_insight(insight_boxes[section], section, item)
+                    except DeepSeekAPIError as e:
+                        st.error(f"❌ DeepSeek API Error: {e}")
+                        st.stop()
+                    esg_data = parser.esg_data
+                    raw_response = "".join(response_parts)
+
+                esg_data["rubric_score"] = score_esg_by_rubric(esg_data, get_rubric())
+                store_analysis(esg_data, company, file, raw_response=raw_response, mode=analysis_mode)
                 
                 # Display scores in a nice box
-                st.markdown(f"""
+                score_placeholder.markdown(f"""
                     <div class="score-box">
                         <div style="display: flex; justify-content: space-between;">
                             <div><strong>LLM Score:</strong> {esg_data['sentiment_score']}/10</div>
@@ -756,24 +384,12 @@ with st.container():
                 """, unsafe_allow_html=True)
 
                 # Show gauge chart
-                show_esg_gauge(float(esg_data["rubric_score"]))
-
-                # Display insights in expanders
-                with st.expander("🌍 Environmental Insights", expanded=True):
-                    for e in esg_data["environment"]: 
-                        st.markdown(f"<div style='margin-bottom: 0.5rem;'>• {e}</div>", unsafe_allow_html=True)
-                
-                with st.expander("🏢 Social Insights"):
-                    for s in esg_data["social"]: 
-                        st.markdown(f"<div style='margin-bottom: 0.5rem;'>• {s}</div>", unsafe_allow_html=True)
-                
-                with st.expander("🏛 Governance Insights"):
-                    for g in esg_data["governance"]: 
-                        st.markdown(f"<div style='margin-bottom: 0.5rem;'>• {g}</div>", unsafe_allow_html=True)
-                
-                with st.expander("🎤 Management Remarks"):
-                    for r in esg_data["management_remarks"]: 
-                        st.markdown(f"<div style='margin-bottom: 1rem; padding-left: 1rem; border-left: 3px solid #2196F3; font-style: italic;'>\"{r}\"</div>", unsafe_allow_html=True)
+                with gauge_placeholder.container():
+                    show_esg_gauge(float(esg_data["rubric_score"]))
+                    if normalization_stats:
+                        st.caption(f"🧹 Stripped {normalization_stats['chars_removed']:,} characters "
+                                   f"(~{normalization_stats['tokens_removed']:,} tokens) of repeated headers, "
+                                   f"footers and whitespace before prompting")
 
                 # Generate and offer download
                 html_file, filename = generate_html_report(esg_data, company)
@@ -805,62 +421,94 @@ st.markdown("""<div class="section-divider"></div>""", unsafe_allow_html=True)
 st.markdown("<h2 style='color:#2196F3;'>📊 ESG Comparison Tool</h2>", unsafe_allow_html=True)
 
 uploaded_html_files = st.file_uploader(
-    "📂 Upload up to 5 ESG HTML Reports", type="html", accept_multiple_files=True
+    "📂 Upload ESG HTML Reports", type="html", accept_multiple_files=True
 )
 
 if st.button("🔍 Compare Reports", type="primary"):
     if not uploaded_html_files:
         st.warning("Please upload at least one HTML file.")
-    elif len(uploaded_html_files) > 5:
-        st.warning("You can compare up to 5 ESG reports.")
     else:
         try:
-            comparison_data = []
-            for file in uploaded_html_files:
-                file_text = file.read().decode("utf-8")
-                soup = BeautifulSoup(file_text, 'html.parser')
-
-                def extract_insights(section_icon):
-                    insights = []
-                    section_header = soup.find(lambda tag: tag.name == 'h2' and section_icon in tag.get_text())
-                    if section_header:
-                        table = section_header.find_next('table')
-                        if table:
-                            rows = table.find_all('tr')[1:]
-                            for row in rows:
-                                cells = row.find_all('td')
-                                if len(cells) >= 2:
-                                    insights.append(cells[1].get_text(strip=True))
-                    return insights[:10]
-
-                company_name = soup.find('h1').text.strip().replace("ESG Insights Report", "").strip()
-                sentiment_div = soup.find('div', class_='sentiment')
-                sentiment_score = "N/A"
-                if sentiment_div:
-                    match = re.search(r'(\d+(\.\d+)?)/10', sentiment_div.get_text())
-                    if match:
-                        sentiment_score = match.group(1)
-
-                report_data = {
-                    'company_name': company_name,
-                    'sentiment_score': sentiment_score,
-                    'environment': extract_insights("🌍"),
-                    'social': extract_insights("🏢"),
-                    'governance': extract_insights("🏛")
-                }
-                comparison_data.append(report_data)
-
-            html_filename = generate_comparison_html(comparison_data)
-            with open(html_filename, 'rb') as f:
-                st.download_button(
-                    label="📥 Download ESG Comparison Report",
-                    data=f,
-                    file_name=html_filename,
-                    mime="text/html"
-                )
+            # Parse the uploads in a worker pool; a file that fails is skipped, not fatal
+            total_files = len(uploaded_html_files)
+            ingest_progress = st.progress(0.0, text=f"📄 Parsing {total_files} reports...")
+            ingest_started = time.time()
+            parsed_reports = [None] * total_files
+            failed_files = []
+            for done, (idx, name, report_data, error) in enumerate(
+                    iter_report_data([(file.name, file) for file in uploaded_html_files]), 1):
+                if error:
+                    failed_files.append(f"{name}: {error}")
+                else:
+                    parsed_reports[idx] = report_data
+                files_per_sec = done / max(time.time() - ingest_started, 1e-9)
+                ingest_progress.progress(done / total_files,
+                                         text=f"📄 Parsed {done}/{total_files} reports ({files_per_sec:.1f} files/sec)")
+
+            comparison_data = [report_data for report_data in parsed_reports if report_data is not None]
+            if failed_files:
+                st.warning("⚠️ Skipped reports that could not be read:\n\n" + "\n\n".join(failed_files))
+            if not comparison_data:
+                raise ValueError("None of the uploaded reports could be read")
+
+            comparison_file = generate_comparison_html(comparison_data)
+            st.download_button(
+                label="📥 Download ESG Comparison Report",
+                data=comparison_file.getvalue(),
+                file_name=COMPARISON_FILE,
+                mime="text/html"
+            )
         except Exception as e:
             st.error(f"❌ Error generating comparison: {str(e)}")
 
+# Analyses run in this app are stored, so they can be compared without uploading reports
+stored_companies = get_analysis_store().companies()
+if stored_companies:
+    selected_companies = st.multiselect("🗄️ Or compare stored analyses (latest per company)", stored_companies)
+    if st.button("🔍 Compare Stored Analyses"):
+        if not selected_companies:
+            st.warning("Please select at least one company.")
+        else:
+            comparison_file = generate_comparison_html(get_analysis_store().comparison_reports(selected_companies))
+            st.download_button(
+                label="📥 Download ESG Comparison Report",
+                data=comparison_file.getvalue(),
+                file_name=COMPARISON_FILE,
+                mime="text/html",
+                key="stored_comparison_download"
+            )
+
+# --- Sidebar: Cache Stats ---
+with st.sidebar.expander("⚡ Cache Stats"):
+    pdf_cache_stats = get_pdf_text_cache().stats()
+    response_cache_stats = get_response_cache().stats()
+    asset_cache_stats = SHARED_ASSET_CACHE.stats()
+    analysis_store_stats = get_analysis_store().stats()
+    st.markdown(f"""
+**PDF text:** {pdf_cache_stats['hits']} hits / {pdf_cache_stats['misses']} misses, {pdf_cache_stats['entries']} entries ({pdf_cache_stats['bytes'] / 1e6:.1f} MB)
+
+**DeepSeek responses:** {response_cache_stats['hits']} hits / {response_cache_stats['misses']} misses, {response_cache_stats['bypasses']} refreshes, {response_cache_stats['tokens_saved']:,} tokens saved
+
+**Token estimate:** {SHARED_TOKEN_ESTIMATOR.chars_per_token:.2f} chars/token ({SHARED_TOKEN_ESTIMATOR.observations} API calibrations)
+
+**Static assets:** {asset_cache_stats['loads']} loads / {asset_cache_stats['hits']} hits, {asset_cache_stats['entries']} entries
+
+**Analysis store:** {analysis_store_stats['analyses']} analyses of {analysis_store_stats['companies']} companies ({analysis_store_stats['bytes'] / 1e6:.1f} MB)
+""")
+
+# --- Sidebar: Stored Analyses ---
+with st.sidebar.expander("🗄️ Stored Analyses"):
+    stored_scores = get_analysis_store().score_frame()
+    if len(stored_scores):
+        st.dataframe(
+            stored_scores[["company", "created_at", "sentiment_score", "rubric_score"]]
+            .rename(columns={"company": "Company", "created_at": "Analyzed", "sentiment_score": "LLM Score",
+                             "rubric_score": "Rubric Score"}),
+            hide_index=True
+        )
+    else:
+        st.caption("No analyses stored yet.")
+
 # Footer
 st.markdown("""
 <div class="custom-footer">
@@ -0,0 +1,111 @@
+"""
+Concurrency check: simultaneous comparisons, as several Streamlit sessions would run them.
+
+Each worker compares its own set of companies and checks that the comparison it gets
+back names exactly those companies. ESGComp.generate_comparison_html now returns the
+HTML in memory; the previous flow (write ESG_Comparison.html in the working directory,
+then reopen it to serve the download) is replayed alongside for reference, and shows
+sessions receiving each other's comparisons. Both are timed.
+
+    python benchmarks/comparison_concurrency.py
+    python benchmarks/comparison_concurrency.py --sessions 16 --rounds 50 --companies 20
+"""
+import os
+import re
+import sys
+import time
+import tempfile
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ESGAnalysis import parse_esg_data  # noqa: E402
+from ESGMockServer import build_canned_response  # noqa: E402
+from ESGComp import generate_comparison_html, COMPARISON_FILE  # noqa: E402
+
+COMPANY_PATTERN = re.compile(r"Session \d+ Company \d+")
+
+
+def session_reports(session, companies):
+    reports = []
+    for idx in range(companies):
+        esg_data = parse_esg_data(build_canned_response("", seed=session * companies + idx))
+        reports.append({
+            "company_name": f"Session {session} Company {idx}",
+            "sentiment_score": esg_data["sentiment_score"],
+            "environment": esg_data["environment"],
+            "social": esg_data["social"],
+            "governance": esg_data["governance"],
+        })
+    return reports
+
+
+def in_memory_comparison(reports, barrier):
+    barrier.wait()
+    return generate_comparison_html(reports).getvalue()
+
+
+def shared_file_comparison(reports, barrier):
+    """The previous flow: one fixed file per working directory, reopened for the download"""
+    barrier.wait()
+    html_filename = generate_comparison_html(reports, COMPARISON_FILE)
+    with open(html_filename, "rb") as f:
+        return f.read()
+
+
+def run(compare, sessions, rounds, companies):
+    """
+    :return: (comparisons that named another session's companies, seconds)
+    """
+    all_reports = [session_reports(session, companies) for session in range(sessions)]
+    expected = [{report["company_name"] for report in reports} for reports in all_reports]
+    barrier = threading.Barrier(sessions)
+    mixed_up = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for _ in range(rounds):
+            futures = [pool.submit(compare, reports, barrier) for reports in all_reports]
+            for session, future in enumerate(futures):
+                html_bytes = future.result()
+                if set(COMPANY_PATTERN.findall(html_bytes.decode("utf-8"))) != expected[session]:
+                    mixed_up += 1
+    return mixed_up, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that concurrent comparisons do not interfere")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent comparisons per round")
+    parser.add_argument("--rounds", type=int, default=25)
+    parser.add_argument("--companies", type=int, default=5, help="Companies per comparison (>5 uses the table layout)")
+    args = parser.parse_args(argv)
+
+    html_text = generate_comparison_html(session_reports(0, args.companies)).getvalue().decode("utf-8")
+    assert html_text.lstrip().startswith("<!DOCTYPE html>") and html_text.rstrip().endswith("</html>")
+
+    total = args.sessions * args.rounds
+    mixed_up, in_memory = run(in_memory_comparison, args.sessions, args.rounds, args.companies)
+    assert mixed_up == 0, f"{mixed_up}/{total} in-memory comparisons contained another session's companies"
+    print(f"✅ {total} concurrent in-memory comparisons, each with only its own companies")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            # Silence the "report generated" line printed per comparison
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                legacy_mixed_up, shared_file = run(shared_file_comparison, args.sessions, args.rounds, args.companies)
+        finally:
+            os.chdir(cwd)
+    print(f"⚠️ Shared {COMPARISON_FILE}: {legacy_mixed_up}/{total} sessions received another session's comparison")
+
+    print(f"{'output':<20}{'total s':>10}{'per comparison ms':>20}")
+    for name, seconds in (("shared file", shared_file), ("in memory", in_memory)):
+        print(f"{name:<20}{seconds:>10.2f}{seconds / total * 1e3:>20.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Micro-benchmark: single-pass ESGComp.scrape_report_html vs the two BeautifulSoup scrapers it
+replaced (ESGComp.extract_data_from_html and the inline copy in the app's Compare handler).
+
+Archived reports are generated without the data island (as before it existed), in the
+current layout and in the older "ESG Report Analysis" layout with a ticker, with cell
+markup, entities and missing sections mixed in; or read from a directory of real reports.
+Every report is checked for parity first, then the scrapers are timed. The shared scraper
+follows ESGComp's scraper (get_text().strip() cell text, ticker suffix) and strips both
+title suffixes from the company name, as the app's copy did for current reports.
+
+    python benchmarks/extract_benchmark.py
+    python benchmarks/extract_benchmark.py --archive esg_reports/
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ESGComp import scrape_report_html, extract_report_data  # noqa: E402
+from ESGReport import generate_html_report, REPORT_DATA_OPEN, REPORT_DATA_CLOSE  # noqa: E402
+from ESGAnalysis import parse_esg_data  # noqa: E402
+from ESGMockServer import build_canned_response  # noqa: E402
+
+DATA_ISLAND_PATTERN = re.compile(rf"\s*{re.escape(REPORT_DATA_OPEN)}.*?{re.escape(REPORT_DATA_CLOSE)}", re.DOTALL)
+CELL_MARKUP_PATTERN = re.compile(r"<td>[^<]*<(?!/td>)")
+
+
+def legacy_extract_data_from_html(html_text):
+    """ESGComp's BeautifulSoup scraper, verbatim except that it takes the HTML text instead of a path"""
+    soup = BeautifulSoup(html_text, 'html.parser')
+
+    # Extract company name from header
+    header = soup.find('header')
+    company_name = "Unknown Company"
+    if header:
+        h1 = header.find('h1')
+        if h1:
+            company_name = h1.text.replace('ESG Report Analysis', '').strip()
+
+    # Extract ticker from subtitle if available
+    subtitle = soup.find('h3', class_='subtitle')
+    if subtitle:
+        subtitle_text = subtitle.get_text()
+        ticker_match = re.search(r'Ticker: (\w+)', subtitle_text)
+        if ticker_match:
+            company_name = f"{company_name} ({ticker_match.group(1)})"
+
+    # Extract sentiment score
+    sentiment_score = "N/A"
+    sentiment_div = soup.find('div', class_='sentiment')
+    if sentiment_div:
+        score_match = re.search(r'(\d+(?:\.\d+)?)/10', sentiment_div.get_text())
+        if score_match:
+            sentiment_score = score_match.group(1)
+
+    # Function to extract insights from a section
+    def extract_insights(section_icon):
+        insights = []
+        # Find the h2 with the matching icon
+        section_header = soup.find(lambda tag: tag.name == 'h2' and section_icon in tag.get_text())
+        if section_header:
+            # Find the next table
+            table = section_header.find_next('table')
+            if table:
+                # Extract all insight rows (skip header row)
+                rows = table.find_all('tr')[1:]  # Skip header row
+                for row in rows:
+                    cells = row.find_all('td')
+                    if len(cells) >= 2:  # Should have at least number and insight
+                        insight = cells[1].get_text().strip()
+                        insights.append(insight)
+        return insights[:10]  # Return max 10 insights
+
+    # Extract all insights
+    env_insights = extract_insights("🌍")
+    soc_insights = extract_insights("🏢")
+    gov_insights = extract_insights("🏛")
+
+    return {
+        'company_name': company_name,
+        'sentiment_score': sentiment_score,
+        'environment': env_insights,
+        'social': soc_insights,
+        'governance': gov_insights
+    }
+
+
+def legacy_app_extract(file_text):
+    """The app's inline scraper, verbatim apart from being wrapped in a function"""
+    soup = BeautifulSoup(file_text, 'html.parser')
+
+    def extract_insights(section_icon):
+        insights = []
+        section_header = soup.find(lambda tag: tag.name == 'h2' and section_icon in tag.get_text())
+        if section_header:
+            table = section_header.find_next('table')
+            if table:
+                rows = table.find_all('tr')[1:]
+                for row in rows:
+                    cells = row.find_all('td')
+                    if len(cells) >= 2:
+                        insights.append(cells[1].get_text(strip=True))
+        return insights[:10]
+
+    company_name = soup.find('h1').text.strip().replace("ESG Insights Report", "").strip()
+    sentiment_div = soup.find('div', class_='sentiment')
+    sentiment_score = "N/A"
+    if sentiment_div:
+        match = re.search(r'(\d+(\.\d+)?)/10', sentiment_div.get_text())
+        if match:
+            sentiment_score = match.group(1)
+
+    return {
+        'company_name': company_name,
+        'sentiment_score': sentiment_score,
+        'environment': extract_insights("🌍"),
+        'social': extract_insights("🏢"),
+        'governance': extract_insights("🏛")
+    }
+
+
+def archived_reports(count, seed=0):
+    """Reports as generated before the data island, with layout and content variations"""
+    rng = random.Random(seed)
+    reports = []
+    for idx in range(count):
+        esg_data = parse_esg_data(build_canned_response("", seed=seed + idx))
+        for section in ("environment", "social", "governance", "management_remarks"):
+            if rng.random() < 0.1:
+                esg_data[section] = []
+            elif rng.random() < 0.2:
+                esg_data[section] = [f"  {item} &amp; <b>{idx}</b> tCO2e \n" for item in esg_data[section]]
+        esg_data["rubric_score"] = f"{rng.uniform(0, 10):.2f}"
+        company_name = rng.choice(["Acme Corp", "Globex", "Initech & Sons", "Umbrella"]) + f" {idx}"
+        html_file, _ = generate_html_report(esg_data, company_name)
+        html_text = DATA_ISLAND_PATTERN.sub("", html_file.getvalue().decode("utf-8"), count=1)
+        if rng.random() < 0.3:
+            ticker = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(4))
+            html_text = html_text.replace(" ESG Insights Report</h1>", " ESG Report Analysis</h1>")
+            html_text = html_text.replace('<h3 class="subtitle">', f'<h3 class="subtitle">Ticker: {ticker} | ')
+        reports.append(html_text)
+    return reports
+
+
+def load_archive(directory):
+    reports = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(".html"):
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                reports.append(f.read())
+    return reports
+
+
+def check_parity(reports):
+    for idx, html_text in enumerate(reports):
+        actual = scrape_report_html(html_text)
+        expected = legacy_extract_data_from_html(html_text)
+        # ESGComp's scraper only knew the older title suffix; current titles are cleaned as the app did
+        expected["company_name"] = expected["company_name"].replace("ESG Insights Report", "").strip()
+        assert actual == expected, f"mismatch with ESGComp scraper on report {idx}:\n{expected}\n!=\n{actual}"
+
+        if "ESG Report Analysis" not in html_text:
+            app = legacy_app_extract(html_text)
+            assert actual["company_name"] == app["company_name"], f"company mismatch with app scraper on report {idx}"
+            assert actual["sentiment_score"] == app["sentiment_score"], f"score mismatch with app scraper on report {idx}"
+            if not CELL_MARKUP_PATTERN.search(html_text):  # get_text(strip=True) drops the spaces around markup
+                assert actual == app, f"mismatch with app scraper on report {idx}:\n{app}\n!=\n{actual}"
+
+
+def time_extractor(extract, reports, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for html_text in reports:
+            extract(html_text)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass report scraper against BeautifulSoup")
+    parser.add_argument("--archive", help="Directory of archived HTML reports to use instead of generated ones")
+    parser.add_argument("--reports", type=int, default=2000, help="Generated reports")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    reports = load_archive(args.archive) if args.archive else archived_reports(args.reports)
+    if args.archive:
+        # Real archives may contain reports with a data island; scrape their visible HTML like legacy files
+        reports = [DATA_ISLAND_PATTERN.sub("", html_text, count=1) for html_text in reports]
+    check_parity(reports)
+    print(f"✅ Parity: {len(reports)} reports extract identically")
+
+    with_island = [generate_html_report(parse_esg_data(build_canned_response("", seed=seed)), f"Company {seed}")[0]
+                   .getvalue().decode("utf-8") for seed in range(len(reports))]
+    legacy = time_extractor(legacy_extract_data_from_html, reports, args.repeat)
+    single_pass = time_extractor(scrape_report_html, reports, args.repeat)
+    island = time_extractor(extract_report_data, with_island, args.repeat)
+    print(f"{'extractor':<28}{'total s':>10}{'per report ms':>16}{'speedup':>10}")
+    for name, seconds in (("BeautifulSoup scraper", legacy), ("single-pass scraper", single_pass),
+                          ("data island (020 reports)", island)):
+        print(f"{name:<28}{seconds:>10.2f}{seconds / len(reports) * 1e3:>16.3f}{legacy / seconds:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
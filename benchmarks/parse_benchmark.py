@@ -0,0 +1,197 @@
+"""
+Micro-benchmark: single-pass ESGAnalysis.parse_esg_data vs the previous multi-regex parser.
+
+Responses of varying size are generated with the mock server's canned content (plus
+format-drift variants), or loaded from a recorded cassette. Every response is checked
+for parity first (whole-text and chunked streaming), then both parsers are timed.
+
+    python benchmarks/parse_benchmark.py
+    python benchmarks/parse_benchmark.py --cassette recorded.jsonl
+"""
+import os
+import re
+import sys
+import json
+import random
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ESGAnalysis import parse_esg_data, ESGStreamParser  # noqa: E402
+from ESGMockServer import build_canned_response  # noqa: E402
+
+
+def legacy_parse_esg_data(api_response):
+    """The multi-regex parser parse_esg_data replaced, kept verbatim as the parity baseline"""
+    esg_data = {
+        "environment": [],
+        "social": [],
+        "governance": [],
+        "management_remarks": [],
+        "sentiment_score": "N/A"
+    }
+
+    try:
+        # Extract Environmental insights
+        env_match = re.search(r'Environmental:\s*(.*?)(?=\n\s*Social:|$)', api_response, re.DOTALL)
+        if env_match:
+            env_insights = [i.strip() for i in env_match.group(1).split('\n') if i.strip()]
+            esg_data["environment"] = [re.sub(r'^\d+\.\s*', '', i) for i in env_insights[:10]]
+
+        # Extract Social insights
+        soc_match = re.search(r'Social:\s*(.*?)(?=\n\s*Governance:|$)', api_response, re.DOTALL)
+        if soc_match:
+            soc_insights = [i.strip() for i in soc_match.group(1).split('\n') if i.strip()]
+            esg_data["social"] = [re.sub(r'^\d+\.\s*', '', i) for i in soc_insights[:10]]
+
+        # Extract Governance insights
+        gov_match = re.search(r'Governance:\s*(.*?)(?=\n\s*Key Remarks:|$)', api_response, re.DOTALL)
+        if gov_match:
+            gov_insights = [i.strip() for i in gov_match.group(1).split('\n') if i.strip()]
+            esg_data["governance"] = [re.sub(r'^\d+\.\s*', '', i) for i in gov_insights[:10]]
+
+        # Extract Management Remarks
+        mgmt_match = re.search(r'Key Remarks:\s*(.*?)(?=\n\s*ESG Sentiment Score:|$)', api_response, re.DOTALL)
+        if mgmt_match:
+            remarks = [i.strip() for i in mgmt_match.group(1).split('\n') if i.strip()]
+            esg_data["management_remarks"] = [re.sub(r'^\d+\.\s*', '', i) for i in remarks[:10]]
+
+        # Extract Sentiment Score
+        sentiment_match = re.search(r'ESG Sentiment Score:\s*(\d+\.?\d*)\s*/\s*10', api_response)
+        if sentiment_match:
+            esg_data["sentiment_score"] = sentiment_match.group(1)
+
+    except Exception as e:
+        print(f"⚠️ Error parsing ESG data: {e}")
+
+    return esg_data
+
+
+def scaled_response(seed, items_per_section, line_repeat=1):
+    """A canned response with items_per_section lines per section and each line repeated line_repeat times"""
+    base = build_canned_response("", seed=seed).split("\n")
+    lines = []
+    for line in base:
+        if re.match(r"^\d+\. ", line):
+            continue
+        lines.append(line)
+        if line.endswith(":") and not line.startswith("ESG"):
+            rng = random.Random(seed + len(lines))
+            body = [entry for entry in base if re.match(r"^\d+\. ", entry)]
+            lines.extend(f"{idx}. {' '.join([rng.choice(body)[3:]] * line_repeat)}"
+                         for idx in range(1, items_per_section + 1))
+            lines.append("")
+    return "\n".join(lines)
+
+
+def drift_variants(seed):
+    """Format drift seen from the model: decorated headers, missing/empty sections, wrapped scores"""
+    response = build_canned_response("", seed=seed)
+    yield response.replace("Environmental:", "**Environmental:**")
+    yield response.replace("Social:", "Social Insights")
+    yield response.replace("Key Remarks:", "Remarks:")
+    yield response.replace("\n\nSocial:", "\nSocial:").replace("Governance:\n", "Governance:\n\n\n  ")
+    yield re.sub(r"ESG Sentiment Score: (\d+)/10", r"ESG Sentiment Score:\n\1\n/ 10", response)
+    yield re.sub(r"ESG Sentiment Score: (\d+)/10", r"ESG Sentiment Score: \1.5 out of 10", response)
+    yield "Environmental:\nSocial:\n" + response.split("Social:\n", 1)[1]
+    yield "Environmental: first item on the header line\n" + response.split("\n", 1)[1]
+    yield response.replace("\n", "\r\n")
+    yield "Summary of Social: programs\n" + response
+    yield response[:len(response) // 2]
+    yield ""
+
+
+def fuzz_responses(count, seed=0):
+    """Random splices of headers, scores, numbering and whitespace, for parity edge cases only"""
+    pieces = ["Environmental:", "Social:", "Governance:", "Key Remarks:", "ESG Sentiment Score:", "7", "/10",
+              "/", "10", "8.5", " ", "  ", "\t", "\r", "\n", "\n\n", "1. ", "x", "Social: y"]
+    rng = random.Random(seed)
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(0, 30))) for _ in range(count)]
+
+
+def load_cassette_responses(path):
+    """Response texts recorded in an ESGClient.Cassette file (plain and streamed exchanges)"""
+    responses = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            exchange = json.loads(line)
+            if exchange.get("response"):
+                for choice in exchange["response"].get("choices", []):
+                    responses.append(choice["message"]["content"])
+            elif exchange.get("events"):
+                responses.append("".join(
+                    (choice.get("delta") or {}).get("content") or ""
+                    for event in exchange["events"] for choice in event.get("choices") or []
+                ))
+    return responses
+
+
+def stream_parse(response, rng):
+    parser = ESGStreamParser()
+    position = 0
+    while position < len(response):
+        size = rng.randint(1, 64)
+        parser.feed(response[position:position + size])
+        position += size
+    parser.close()
+    return parser.esg_data
+
+
+def check_parity(responses, seed=0):
+    rng = random.Random(seed)
+    for idx, response in enumerate(responses):
+        expected = legacy_parse_esg_data(response)
+        actual = parse_esg_data(response)
+        assert actual == expected, f"parse mismatch on response {idx}:\n{expected}\n!=\n{actual}"
+        streamed = stream_parse(response, rng)
+        assert streamed == expected, f"stream mismatch on response {idx}:\n{expected}\n!=\n{streamed}"
+
+
+def time_parser(parser, responses, repeat):
+    timer = timeit.Timer(lambda: [parser(response) for response in responses])
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat, loops)) / loops / len(responses)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parse_esg_data against the previous regex parser")
+    parser.add_argument("--cassette", help="Also benchmark the responses recorded in this cassette file")
+    parser.add_argument("--responses", type=int, default=20, help="Generated responses per size bucket")
+    parser.add_argument("--fuzz", type=int, default=20000, help="Random responses checked for parity (not timed)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    buckets = {
+        "canned (10/section)": [build_canned_response("", seed=seed) for seed in range(args.responses)],
+        "50 items/section": [scaled_response(seed, 50) for seed in range(args.responses)],
+        "500 items/section": [scaled_response(seed, 500) for seed in range(args.responses)],
+        "10 long items/section": [scaled_response(seed, 10, line_repeat=40) for seed in range(args.responses)],
+        "format drift": [variant for seed in range(args.responses) for variant in drift_variants(seed)],
+    }
+    if args.cassette:
+        buckets["cassette"] = load_cassette_responses(args.cassette)
+
+    fuzz = fuzz_responses(args.fuzz)
+    check_parity(fuzz)
+    for name, responses in buckets.items():
+        check_parity(responses)
+    print(f"✅ Parity: {sum(len(responses) for responses in buckets.values()) + len(fuzz)} responses parse "
+          f"identically (whole text and chunked stream)")
+
+    print(f"{'bucket':<24}{'avg size':>12}{'regex µs':>12}{'1-pass µs':>12}{'speedup':>10}")
+    for name, responses in buckets.items():
+        if not responses:
+            continue
+        avg_size = sum(len(response) for response in responses) / len(responses)
+        legacy = time_parser(legacy_parse_esg_data, responses, args.repeat)
+        single_pass = time_parser(parse_esg_data, responses, args.repeat)
+        print(f"{name:<24}{avg_size:>12,.0f}{legacy * 1e6:>12.1f}{single_pass * 1e6:>12.1f}"
+              f"{legacy / single_pass:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
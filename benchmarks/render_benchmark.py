@@ -0,0 +1,502 @@
+"""
+Micro-benchmark: template-based report rendering vs the previous string-concatenating builders.
+
+Renders 1,000 single-company reports (ESGReport.generate_html_report) and a 100-company
+comparison (ESGComp.render_comparison_html) from mock-server content, timed up to the
+encoded bytes that get written. Both sides embed the logo through the asset cache, so
+only rendering is compared. Outputs are checked for parity first: they must be
+identical outside the stylesheet (report.css is indented differently and the
+comparison's score-table rule comes last) and the report data island.
+
+Finally the companies-as-rows comparison (ESGComp.render_comparison_table_html) is
+rendered at 10x, 100x and 1000x the column layout's maximum to show that its size and
+render time grow linearly.
+
+    python benchmarks/render_benchmark.py
+    python benchmarks/render_benchmark.py --reports 5000 --companies 500
+"""
+import os
+import re
+import io
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ESGAnalysis import parse_esg_data  # noqa: E402
+from ESGMockServer import build_canned_response  # noqa: E402
+from ESGReport import generate_html_report, embed_logo_base64  # noqa: E402
+from ESGComp import render_comparison_html, render_comparison_table_html, COMPARISON_MAX_COLUMNS  # noqa: E402
+from ESGTemplate import encode_parts  # noqa: E402
+
+# The stylesheet, plus the report data island the old builder did not emit
+STYLE_PATTERN = re.compile(r'<style>.*?</style>(\s*<script type="application/json"[^>]*>.*?</script>)?', re.DOTALL)
+
+
+def legacy_generate_html_report(esg_data, company_name):
+    """
+    The concatenating report builder generate_html_report replaced, verbatim except that the
+    unused output file name is no longer built
+    """
+    # Clean company name for filename
+    safe_company_name = re.sub(r'[^\w\-_]', '_', company_name)[:50]
+    logo_data_uri = embed_logo_base64()
+
+    # Format current date
+    current_date = datetime.now().strftime("%B %d, %Y")
+
+    def generate_section(title, icon, insights):
+        if not insights:
+            return ""
+        section_html = f"""
+            <h2><span class="category-icon">{icon}</span>{title}</h2>
+            <table>
+                <thead>
+                    <tr>
+                        <th width="5%">#</th>
+                        <th>Insight</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """
+        for idx, insight in enumerate(insights, 1):
+            section_html += f"""
+                    <tr>
+                        <td>{idx}</td>
+                        <td>{insight}</td>
+                    </tr>
+            """
+        section_html += """
+                </tbody>
+            </table>
+        """
+        return section_html
+
+    # Build the complete HTML content
+    html_content = f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{company_name} ESG Insights Report</title>
+        <style>
+            body {{
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                background-color: #f9f9f9;
+                padding: 0;
+                margin: 0;
+            }}
+            .container {{
+                max-width: 1000px;
+                margin: 20px auto;
+                background: white;
+                padding: 30px;
+                border-radius: 8px;
+                box-shadow: 0 0 20px rgba(0,0,0,0.1);
+            }}
+            header {{
+                border-bottom: 2px solid #2196F3;
+                padding-bottom: 20px;
+                margin-bottom: 30px;
+            }}
+            h1, h2, h3 {{
+                color: #2c3e50;
+            }}
+            h1 {{
+                margin-top: 0;
+                font-size: 2.2em;
+            }}
+            h2 {{
+                border-bottom: 1px solid #eee;
+                padding-bottom: 8px;
+                margin-top: 30px;
+                font-size: 1.5em;
+                color: #2196F3;
+            }}
+            h3.subtitle {{
+                color: #7f8c8d;
+                font-weight: normal;
+            }}
+            table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin: 20px 0;
+                font-size: 0.95em;
+            }}
+            th, td {{
+                border: 1px solid #ddd;
+                padding: 12px 15px;
+                text-align: left;
+            }}
+            th {{
+                background-color: #2196F3;
+                color: white;
+                font-weight: bold;
+            }}
+            tr:nth-child(even) {{
+                background-color: #f2f2f2;
+            }}
+            tr:hover {{
+                background-color: #e3f2fd;
+            }}
+            .sentiment {{
+                font-size: 1.2em;
+                padding: 10px 15px;
+                background-color: #e8f5e9;
+                border-radius: 4px;
+                display: inline-block;
+                margin: 10px 0;
+            }}
+            footer {{
+                margin-top: 40px;
+                text-align: center;
+                font-size: 0.9em;
+                color: #7f8c8d;
+                border-top: 1px solid #eee;
+                padding-top: 20px;
+            }}
+            .category-icon {{
+                font-size: 1.2em;
+                margin-right: 8px;
+            }}
+        </style>
+    </head>
+    <body>
+    <div class="container">
+        <img src="{logo_data_uri}" alt="Company Logo" style="height:30px; max-width:175px; margin-bottom:20px;">
+            <header>
+                <h1>{company_name} ESG Insights Report</h1>
+                <h3 class="subtitle">Generated on: {current_date}</h3>
+                <div class="sentiment">
+                    <strong>LLM Score:</strong> {esg_data.get('sentiment_score', 'N/A')}/10<br>
+                    <strong>Rubric Score:</strong> {esg_data.get('rubric_score', 'N/A')}/10
+                </div>
+            </header>
+    """
+
+    # Add sections
+    html_content += generate_section("Environmental Insights", "🌍", esg_data["environment"])
+    html_content += generate_section("Social Insights", "🏢", esg_data["social"])
+    html_content += generate_section("Governance Insights", "🏛", esg_data["governance"])
+
+    # Add management remarks if available
+    if esg_data["management_remarks"]:
+        html_content += """
+            <h2>🎤 Key Remarks by Management</h2>
+            <table>
+                <thead>
+                    <tr>
+                        <th width="5%">#</th>
+                        <th>Remark</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """
+        for idx, remark in enumerate(esg_data["management_remarks"], 1):
+            html_content += f"""
+                    <tr>
+                        <td>{idx}</td>
+                        <td>{remark}</td>
+                    </tr>
+            """
+        html_content += """
+                </tbody>
+            </table>
+        """
+
+    # Footer
+    html_content += f"""
+            <footer>
+                ESG Insights Generated On {current_date}<br><br>
+                <strong>Contact:</strong> <a href="mailto:inquiry@aranca.com">inquiry@aranca.com</a> |
+                <a href="https://www.linkedin.com/in/your-profile" target="_blank">LinkedIn</a>
+            </footer>
+
+        </div>
+    </body>
+    </html>
+    """
+
+    # Create an in-memory file
+    file_stream = io.BytesIO()
+    file_stream.write(html_content.encode('utf-8'))
+    file_stream.seek(0)
+
+    # Send file as an attachment
+    return file_stream, safe_company_name
+
+
+def legacy_render_comparison_html(esg_reports):
+    """
+    The concatenating comparison builder render_comparison_html replaced, verbatim except that
+    the 5-report cap is lifted and the HTML is returned instead of written to ESG_Comparison.html
+    """
+    current_date = datetime.now().strftime("%B %d, %Y")
+    
+    # Extract company names and scores
+    company_names = [report['company_name'] for report in esg_reports]
+    sentiment_scores = [report['sentiment_score'] for report in esg_reports]
+    
+    # Calculate dynamic column widths
+    num_companies = len(company_names)
+    first_col_width = "12%"  # Reduced from 30% to 12% (60% reduction)
+    other_col_width = f"{(88/num_companies):.2f}%"  # Distribute remaining 88% space
+    
+    # Generate comparison tables for E, S, G
+    def generate_comparison_section(title, icon, category):
+        section_html = f"""
+            <h2><span class="category-icon">{icon}</span>{title} Comparison</h2>
+            <table>
+                <thead>
+                    <tr>
+                        <th width="{first_col_width}">Insight</th>
+        """
+        
+        # Add company headers with dynamic width
+        for name in company_names:
+            section_html += f'<th width="{other_col_width}">{name}</th>'
+        section_html += "</tr></thead><tbody>"
+        
+        # Find maximum number of insights across all reports for this category
+        max_insights = max(len(report[category]) for report in esg_reports)
+        
+        # Add insights (up to 10 per category)
+        for i in range(min(10, max_insights)):
+            section_html += f'<tr><td>Insight {i+1}</td>'
+            for report in esg_reports:
+                # Get the insight if it exists, otherwise use "N/A"
+                insight = report[category][i] if i < len(report[category]) else "N/A"
+                section_html += f'<td>{insight}</td>'
+            section_html += '</tr>'
+        
+        section_html += "</tbody></table>"
+        return section_html
+    
+    # Build the complete HTML content
+    html_content = f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>ESG Comparison Report</title>
+        <style>
+            body {{ 
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                background-color: #f9f9f9;
+                padding: 0;
+                margin: 0;
+            }}
+            .container {{
+                max-width: 1000px;
+                margin: 20px auto;
+                background: white;
+                padding: 30px;
+                border-radius: 8px;
+                box-shadow: 0 0 20px rgba(0,0,0,0.1);
+            }}
+            header {{
+                border-bottom: 2px solid #2196F3;
+                padding-bottom: 20px;
+                margin-bottom: 30px;
+            }}
+            h1, h2, h3 {{
+                color: #2c3e50;
+            }}
+            h1 {{
+                margin-top: 0;
+                font-size: 2.2em;
+            }}
+            h2 {{
+                border-bottom: 1px solid #eee;
+                padding-bottom: 8px;
+                margin-top: 30px;
+                font-size: 1.5em;
+                color: #2196F3;
+            }}
+            h3.subtitle {{
+                color: #7f8c8d;
+                font-weight: normal;
+            }}
+            table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin: 20px 0;
+                font-size: 0.95em;
+            }}
+            th, td {{
+                border: 1px solid #ddd;
+                padding: 12px 15px;
+                text-align: left;
+            }}
+            th {{
+                background-color: #2196F3;
+                color: white;
+                font-weight: bold;
+            }}
+            tr:nth-child(even) {{
+                background-color: #f2f2f2;
+            }}
+            tr:hover {{
+                background-color: #e3f2fd;
+            }}
+            .sentiment {{
+                font-size: 1.2em;
+                padding: 10px 15px;
+                background-color: #e8f5e9;
+                border-radius: 4px;
+                display: inline-block;
+                margin: 10px 0;
+            }}
+            .score-table {{
+                margin-bottom: 40px;
+            }}
+            footer {{
+                margin-top: 40px;
+                text-align: center;
+                font-size: 0.9em;
+                color: #7f8c8d;
+                border-top: 1px solid #eee;
+                padding-top: 20px;
+            }}
+            .category-icon {{
+                font-size: 1.2em;
+                margin-right: 8px;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <header>
+                <h1>ESG Comparison Report</h1>
+                <h3 class="subtitle">Generated on: {current_date}</h3>
+            </header>
+            
+            <h2>📊 Overall ESG Comparison</h2>
+            <table class="score-table">
+                <thead>
+                    <tr>
+                        <th width="30%">Company</th>
+                        <th width="70%">ESG Sentiment Score</th>
+                    </tr>
+                </thead>
+                <tbody>
+    """
+    
+    # Add score comparison
+    for name, score in zip(company_names, sentiment_scores):
+        html_content += f"""
+                    <tr>
+                        <td>{name}</td>
+                        <td>{score}/10</td>
+                    </tr>
+        """
+    
+    html_content += """
+                </tbody>
+            </table>
+    """
+    
+    # Add comparison sections
+    html_content += generate_comparison_section("Environmental", "🌍", "environment")
+    html_content += generate_comparison_section("Social", "🏢", "social")
+    html_content += generate_comparison_section("Governance", "🏛", "governance")
+    
+    # Footer
+    html_content += f"""
+            <footer>
+                ESG Comparison Report generated on {current_date}<br>
+                </footer>
+        </div>
+    </body>
+    </html>
+    """
+    
+    return html_content
+
+
+def sample_analyses(count, seed=0):
+    """Parsed mock analyses with rubric scores, varying in section sizes"""
+    rng = random.Random(seed)
+    analyses = []
+    for idx in range(count):
+        esg_data = parse_esg_data(build_canned_response("", seed=seed + idx))
+        for section in ("environment", "social", "governance", "management_remarks"):
+            esg_data[section] = esg_data[section][:rng.randint(0, 10)]
+        esg_data["rubric_score"] = f"{rng.uniform(0, 10):.2f}"
+        esg_data["company_name"] = f"Company {idx}"
+        analyses.append(esg_data)
+    return analyses
+
+
+def check_parity(analyses):
+    for esg_data in analyses:
+        expected = STYLE_PATTERN.sub("", legacy_generate_html_report(esg_data, esg_data["company_name"])[0]
+                                     .getvalue().decode("utf-8"))
+        actual = STYLE_PATTERN.sub("", generate_html_report(esg_data, esg_data["company_name"])[0]
+                                   .getvalue().decode("utf-8"))
+        assert actual == expected, f"report mismatch for {esg_data['company_name']}"
+    for size in (1, 5, len(analyses)):
+        expected = STYLE_PATTERN.sub("", legacy_render_comparison_html(analyses[:size]))
+        actual = STYLE_PATTERN.sub("", "".join(render_comparison_html(analyses[:size])))
+        assert actual == expected, f"comparison mismatch for {size} companies"
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark report and comparison rendering")
+    parser.add_argument("--reports", type=int, default=1000, help="Single-company reports rendered per run")
+    parser.add_argument("--companies", type=int, default=100, help="Companies in the comparison")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    analyses = sample_analyses(max(args.reports, args.companies))
+    check_parity(analyses[:200])
+    print("✅ Parity: reports and comparisons identical outside the stylesheet and data island")
+
+    reports = analyses[:args.reports]
+    companies = analyses[:args.companies]
+    cases = {
+        f"{len(reports)} reports": (
+            lambda: [legacy_generate_html_report(esg_data, esg_data["company_name"]) for esg_data in reports],
+            lambda: [generate_html_report(esg_data, esg_data["company_name"]) for esg_data in reports],
+        ),
+        f"{len(companies)}-company comparison": (
+            lambda: legacy_render_comparison_html(companies).encode("utf-8"),
+            lambda: encode_parts(render_comparison_html(companies)),
+        ),
+    }
+    print(f"{'case':<28}{'concat ms':>12}{'template ms':>14}{'speedup':>10}")
+    for name, (legacy, template) in cases.items():
+        legacy_time = best_time(legacy, args.repeat)
+        template_time = best_time(template, args.repeat)
+        print(f"{name:<28}{legacy_time * 1e3:>12.1f}{template_time * 1e3:>14.1f}{legacy_time / template_time:>9.1f}x")
+
+    print(f"\n{'table layout':<28}{'KB':>12}{'ms':>14}{'KB/company':>12}")
+    for factor in (10, 100, 1000):
+        count = COMPARISON_MAX_COLUMNS * factor
+        table_reports = [{**analyses[idx % len(analyses)], "company_name": f"Company {idx}"} for idx in range(count)]
+        size = len(encode_parts(render_comparison_table_html(table_reports)))
+        seconds = best_time(lambda: encode_parts(render_comparison_table_html(table_reports)), args.repeat)
+        print(f"{f'{count} companies':<28}{size / 1024:>12.0f}{seconds * 1e3:>14.1f}{size / 1024 / count:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
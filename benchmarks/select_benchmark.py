@@ -0,0 +1,88 @@
+"""
+Check and micro-benchmark for ESGText.select_relevant_pages.
+
+Synthetic documents over the token budget are checked first:
+- an English report with a few ESG-heavy pages among filler: every ESG page is kept,
+  the rest of the budget is filled with filler pages in page order;
+- reports with no ESG vocabulary (lorem ipsum, German): the leading pages that fit are
+  kept, never nothing;
+- selections always fit the budget and come back in page order.
+Then selection is timed on a long report.
+
+    python benchmarks/select_benchmark.py
+    python benchmarks/select_benchmark.py --pages 2000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ESGText import select_relevant_pages, estimate_tokens, SELECT_TOKENS  # noqa: E402
+
+ESG_WORDS = ("scope 1 emissions fell to 1,037 tCO2e as renewable energy reached 64% of electricity; "
+             "board independence, whistleblower cases and employee safety (LTIFR 0.4) are reported").split()
+FILLER_WORDS = "the company delivered revenue growth across its product lines and regional markets".split()
+LOREM_WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt".split()
+GERMAN_WORDS = ("der Konzern senkte seine Treibhausgasemissionen deutlich und erhöhte den Anteil "
+                "erneuerbarer Energien sowie die Vielfalt im Aufsichtsrat").split()
+
+
+def page(rng, words, tokens=2000):
+    text = []
+    while estimate_tokens(" ".join(text)) < tokens:
+        text.append(rng.choice(words))
+    return " ".join(text)
+
+
+def document(rng, page_count, words, esg_pages=()):
+    return [(idx, page(rng, ESG_WORDS if idx in esg_pages else words)) for idx in range(page_count)]
+
+
+def check_selection(name, pages, selected, budget):
+    page_numbers = [page_num for page_num, _ in selected]
+    assert selected, f"{name}: no pages selected"
+    assert page_numbers == sorted(page_numbers), f"{name}: pages out of order"
+    used = sum(estimate_tokens(text) for _, text in selected)
+    assert used <= budget, f"{name}: {used:,} tokens over the {budget:,} budget"
+    print(f"✅ {name}: {len(selected)}/{len(pages)} pages, {used:,}/{budget:,} tokens")
+    return page_numbers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check and time relevance-ranked page selection")
+    parser.add_argument("--pages", type=int, default=500, help="Pages in the timed report")
+    parser.add_argument("--budget", type=int, default=SELECT_TOKENS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    rng = random.Random(0)
+
+    esg_pages = {3, 17, 18, 29, 41}
+    pages = document(rng, 60, FILLER_WORDS, esg_pages)
+    selected = check_selection("English report, 5 ESG pages", pages,
+                               select_relevant_pages(pages, args.budget), args.budget)
+    assert esg_pages <= set(selected), "ESG pages missing from the selection"
+    filler = [page_num for page_num in selected if page_num not in esg_pages]
+    assert filler == [page_num for page_num, _ in pages if page_num not in esg_pages][:len(filler)], \
+        "leftover budget not filled with the leading filler pages"
+
+    for name, words in (("lorem ipsum", LOREM_WORDS), ("German report", GERMAN_WORDS)):
+        pages = document(rng, 20, words)
+        selected = check_selection(f"{name}, no ESG vocabulary", pages,
+                                   select_relevant_pages(pages, args.budget), args.budget)
+        assert selected == list(range(len(selected))), f"{name}: expected the leading pages"
+
+    pages = document(rng, args.pages, FILLER_WORDS, set(rng.sample(range(args.pages), args.pages // 10)))
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        select_relevant_pages(pages, args.budget)
+        timings.append(time.perf_counter() - started)
+    print(f"⏱️ {args.pages} pages selected in {min(timings) * 1e3:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Benchmark: comparison and dashboard queries against ESGStore.AnalysisStore vs re-parsing
+uploaded report HTML, plus a check that concurrent writers do not lose analyses.
+
+Writer processes insert mock analyses into a fresh store at the same time, as separate
+app processes would; every row must land. Then the queries are timed: the latest
+analyses of 5 companies for a comparison (against scraping those 5 reports' HTML),
+the latest scores and the latest full analysis of every company (the dashboard),
+one company's history and a document-hash lookup.
+
+    python benchmarks/store_benchmark.py
+    python benchmarks/store_benchmark.py --companies 5000 --analyses 4
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ESGAnalysis import parse_esg_data  # noqa: E402
+from ESGMockServer import build_canned_response  # noqa: E402
+from ESGReport import generate_html_report  # noqa: E402
+from ESGComp import extract_report_data, scrape_report_html  # noqa: E402
+from ESGStore import AnalysisStore  # noqa: E402
+
+
+def write_analyses(path, writer, writers, companies, analyses):
+    """Writer process: stores `analyses` analyses for every company assigned to it"""
+    store = AnalysisStore(path)
+    rng = random.Random(writer)
+    started = datetime(2025, 1, 1)
+    written = 0
+    for company in range(writer, companies, writers):
+        for version in range(analyses):
+            response = build_canned_response("", seed=company * analyses + version)
+            esg_data = parse_esg_data(response)
+            esg_data["rubric_score"] = f"{rng.uniform(0, 10):.2f}"
+            store.put(esg_data, f"Company {company}", ticker=f"C{company:04d}",
+                      document_hash=f"{company:08x}{version:056x}", raw_response=response, mode="Streaming",
+                      created_at=started + timedelta(days=version, seconds=company))
+            written += 1
+    return written
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark analysis store queries against re-parsing reports")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--analyses", type=int, default=3, help="Analyses stored per company")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer processes")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "analyses.sqlite3")
+        AnalysisStore(path)  # Create the schema before the writers race to
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.writers) as pool:
+            written = sum(pool.map(write_analyses, [path] * args.writers, range(args.writers),
+                                   [args.writers] * args.writers, [args.companies] * args.writers,
+                                   [args.analyses] * args.writers))
+        write_seconds = time.perf_counter() - started
+
+        store = AnalysisStore(path)
+        stats = store.stats()
+        expected = args.companies * args.analyses
+        assert written == expected and stats["analyses"] == expected, f"{stats['analyses']}/{expected} analyses stored"
+        assert stats["companies"] == args.companies
+        print(f"✅ {args.writers} concurrent writers stored all {expected:,} analyses "
+              f"({expected / write_seconds:,.0f} analyses/sec, {stats['bytes'] / 1e6:.1f} MB)")
+
+        selected = [f"Company {company}" for company in random.Random(0).sample(range(args.companies), 5)]
+        reports = store.comparison_reports(selected)
+        assert [report["company_name"] for report in reports] == selected
+        latest = store.latest([selected[0]])[0]
+        assert latest["created_at"] == max(record["created_at"] for record in store.history(selected[0]))
+
+        # The same 5 companies as uploaded report HTML, with and without the data island
+        html_reports = []
+        for name in selected:
+            record = store.latest([name])[0]
+            html_file, _ = generate_html_report({**record, "sentiment_score": f"{record['sentiment_score']}"}, name)
+            html_reports.append(html_file.getvalue().decode("utf-8"))
+
+        cases = (
+            ("scrape 5 reports", lambda: [scrape_report_html(html_text) for html_text in html_reports]),
+            ("data island, 5 reports", lambda: [extract_report_data(html_text) for html_text in html_reports]),
+            ("store: 5 companies", lambda: store.comparison_reports(selected)),
+            (f"store: {args.companies} latest scores", lambda: store.score_frame()),
+            (f"store: {args.companies} latest analyses", lambda: store.latest()),
+            ("store: company history", lambda: store.history(selected[0])),
+            ("store: document lookup", lambda: store.by_document(latest["document_hash"])),
+        )
+        print(f"{'query':<28}{'ms':>10}")
+        for name, func in cases:
+            print(f"{name:<28}{best_time(func, args.repeat) * 1e3:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+// ESG comparison table (see ESGComp.render_comparison_table_html).
+// Rows are built from the embedded columnar dataset one page at a time, so the
+// document stays small however many companies are compared; insights are only
+// turned into DOM nodes when a company row is expanded.
+(function () {
+    "use strict";
+
+    var dataset = JSON.parse(document.getElementById("esg-comparison-data").textContent);
+    var columns = dataset.columns;
+    var sections = ["environment", "social", "governance"];
+    var count = columns.company_name.length;
+    var state = {sortKey: "sentiment_score", descending: true, page: 0, pageSize: 50, filter: "", minScore: null};
+    var order = [];
+    var expanded = {};
+
+    function sortValue(index, key) {
+        if (key === "company_name") {
+            return columns.company_name[index].toLowerCase();
+        }
+        if (key === "sentiment_score") {
+            return columns.sentiment_score[index];
+        }
+        return columns[key][index].length;
+    }
+
+    function compare(a, b) {
+        var x = sortValue(a, state.sortKey);
+        var y = sortValue(b, state.sortKey);
+        if (x === y) {
+            return a - b;
+        }
+        if (x === null) {
+            return 1;  // Missing scores last in either direction
+        }
+        if (y === null) {
+            return -1;
+        }
+        return (x < y ? -1 : 1) * (state.descending ? -1 : 1);
+    }
+
+    function refresh() {
+        var filter = state.filter.toLowerCase();
+        order = [];
+        for (var index = 0; index < count; index++) {
+            var score = columns.sentiment_score[index];
+            if (filter && columns.company_name[index].toLowerCase().indexOf(filter) === -1) {
+                continue;
+            }
+            if (state.minScore !== null && (score === null || score < state.minScore)) {
+                continue;
+            }
+            order.push(index);
+        }
+        order.sort(compare);
+        state.page = Math.min(state.page, pageCount() - 1);
+        render();
+    }
+
+    function pageCount() {
+        return Math.max(1, Math.ceil(order.length / state.pageSize));
+    }
+
+    function addCell(row, text) {
+        var cell = document.createElement("td");
+        cell.textContent = text;
+        row.appendChild(cell);
+        return cell;
+    }
+
+    function companyRow(index) {
+        var row = document.createElement("tr");
+        var score = columns.sentiment_score[index];
+        row.className = expanded[index] ? "company-row expanded" : "company-row";
+        addCell(row, columns.company_name[index]);
+        addCell(row, score === null ? "N/A" : score + "/10");
+        sections.forEach(function (section) {
+            addCell(row, columns[section][index].length + " insights");
+        });
+        row.addEventListener("click", function () {
+            expanded[index] = !expanded[index];
+            render();
+        });
+        return row;
+    }
+
+    function detailRow(index) {
+        var row = document.createElement("tr");
+        row.className = "detail-row";
+        addCell(row, "").colSpan = 2;
+        sections.forEach(function (section) {
+            var list = document.createElement("ol");
+            columns[section][index].forEach(function (insight) {
+                var item = document.createElement("li");
+                item.textContent = insight;
+                list.appendChild(item);
+            });
+            addCell(row, "").appendChild(list);
+        });
+        return row;
+    }
+
+    function render() {
+        var fragment = document.createDocumentFragment();
+        var start = state.page * state.pageSize;
+        order.slice(start, start + state.pageSize).forEach(function (index) {
+            fragment.appendChild(companyRow(index));
+            if (expanded[index]) {
+                fragment.appendChild(detailRow(index));
+            }
+        });
+        document.querySelector("#comparison-table tbody").replaceChildren(fragment);
+
+        document.getElementById("page-info").textContent = "Page " + (state.page + 1) + " of " + pageCount()
+            + " (" + order.length + " of " + count + " companies)";
+        document.getElementById("prev-page").disabled = state.page === 0;
+        document.getElementById("next-page").disabled = state.page >= pageCount() - 1;
+        document.querySelectorAll("#comparison-table th[data-sort]").forEach(function (header) {
+            header.className = header.dataset.sort !== state.sortKey ? "" : (state.descending ? "sorted-desc" : "sorted-asc");
+        });
+    }
+
+    document.querySelectorAll("#comparison-table th[data-sort]").forEach(function (header) {
+        header.addEventListener("click", function () {
+            var key = header.dataset.sort;
+            state.descending = key === state.sortKey ? !state.descending : key !== "company_name";
+            state.sortKey = key;
+            refresh();
+        });
+    });
+    document.getElementById("company-filter").addEventListener("input", function (event) {
+        state.filter = event.target.value;
+        state.page = 0;
+        refresh();
+    });
+    document.getElementById("min-score").addEventListener("input", function (event) {
+        var value = parseFloat(event.target.value);
+        state.minScore = isNaN(value) ? null : value;
+        state.page = 0;
+        refresh();
+    });
+    document.getElementById("page-size").addEventListener("change", function (event) {
+        state.pageSize = parseInt(event.target.value, 10);
+        state.page = 0;
+        refresh();
+    });
+    document.getElementById("prev-page").addEventListener("click", function () {
+        state.page = Math.max(0, state.page - 1);
+        render();
+    });
+    document.getElementById("next-page").addEventListener("click", function () {
+        state.page = Math.min(pageCount() - 1, state.page + 1);
+        render();
+    });
+
+    refresh();
+})();